@@ -21,12 +21,12 @@ async def drain_outside_battle_warnings():
     """Send a warning message for each member who's joined after using battles in another clan."""
     primary_clans = {clan["tag"]: clan for clan in db_utils.get_primary_clans()}
 
-    for (clash_data, outside_battles) in UNSENT_WARNINGS:
+    while UNSENT_WARNINGS:
+        clash_data, outside_battles = UNSENT_WARNINGS.popleft()
+
         if primary_clans[clash_data["clan_tag"]]["assign_strikes"]:
             await discord_utils.send_outside_battles_warning(clash_data, outside_battles)
 
-    UNSENT_WARNINGS.clear()
-
 class AutomatedRoutines(commands.Cog):
     """Automated routines."""
     GUILD: discord.Guild = None
@@ -195,19 +195,23 @@ class AutomatedRoutines(commands.Cog):
             try:
                 api_is_broken = db_utils.update_cards_in_database()
 
-                for tag, clan in primary_clans.items():
-                    if clan["track_stats"]:
-                        stat_utils.update_clan_battle_day_stats(tag, True, api_is_broken)
-                        stat_utils.save_river_race_clans_info(tag, True)
+                tags = [tag for tag, clan in primary_clans.items() if clan["track_stats"]]
+                medal_counts = db_utils.get_medal_counts_for_clans(tags)
+                last_checks = db_utils.get_last_checks(tags)
+
+                for tag in tags:
+                    stat_utils.update_clan_battle_day_stats(tag, True, api_is_broken, medal_counts[tag], last_checks.get(tag))
+                    stat_utils.save_river_race_clans_info(tag, True)
 
             except Exception as e:
                 LOG.exception(e)
 
+            season_id = None
+
             if clash_utils.is_first_day_of_season():
-                db_utils.create_new_season()
+                season_id = db_utils.create_new_season()
 
-            for tag in primary_clans:
-                db_utils.prepare_for_river_race(tag)
+            db_utils.prepare_for_river_races(list(primary_clans), season_id=season_id)
 
             for tag in primary_clans:
                 db_utils.fix_anomalies(tag)
@@ -224,9 +228,12 @@ class AutomatedRoutines(commands.Cog):
                 api_is_broken = db_utils.update_cards_in_database()
                 primary_clans = {clan["tag"]: clan for clan in db_utils.get_primary_clans()}
 
-                for tag, clan in primary_clans.items():
-                    if clan["track_stats"]:
-                        stat_utils.update_clan_battle_day_stats(tag, False, api_is_broken)
+                tags = [tag for tag, clan in primary_clans.items() if clan["track_stats"]]
+                medal_counts = db_utils.get_medal_counts_for_clans(tags)
+                last_checks = db_utils.get_last_checks(tags)
+
+                for tag in tags:
+                    stat_utils.update_clan_battle_day_stats(tag, False, api_is_broken, medal_counts[tag], last_checks.get(tag))
 
             except Exception as e:
                 LOG.exception(e)
@@ -244,9 +251,12 @@ class AutomatedRoutines(commands.Cog):
                 api_is_broken = db_utils.update_cards_in_database()
                 primary_clans = {clan["tag"]: clan for clan in db_utils.get_primary_clans()}
 
-                for tag, clan in primary_clans.items():
-                    if clan["track_stats"]:
-                        stat_utils.update_clan_battle_day_stats(tag, False, api_is_broken)
+                tags = [tag for tag, clan in primary_clans.items() if clan["track_stats"]]
+                medal_counts = db_utils.get_medal_counts_for_clans(tags)
+                last_checks = db_utils.get_last_checks(tags)
+
+                for tag in tags:
+                    stat_utils.update_clan_battle_day_stats(tag, False, api_is_broken, medal_counts[tag], last_checks.get(tag))
 
             except Exception as e:
                 LOG.exception(e)
@@ -1,9 +1,12 @@
 """Bot events cog."""
 
+from typing import List
+
 import discord
 from discord.ext import commands
 
 import utils.db_utils as db_utils
+import utils.discord_utils as discord_utils
 import utils.kick_utils as kick_utils
 from log.logger import LOG, log_message
 from utils.channel_manager import CHANNEL
@@ -30,6 +33,12 @@ class EventsManager(commands.Cog):
         db_utils.dissociate_discord_info_from_user(member)
 
 
+    @commands.Cog.listener()
+    async def on_guild_emojis_update(self, guild: discord.Guild, before: List[discord.Emoji], after: List[discord.Emoji]):
+        """Clear cached emoji lookups when the server's emojis change."""
+        discord_utils.clear_emoji_cache(guild)
+
+
     @commands.Cog.listener()
     async def on_message(self, message: discord.Message):
         """Check for kick screenshots."""
@@ -4,6 +4,7 @@ import discord
 from discord import app_commands
 
 import utils.clash_utils as clash_utils
+import utils.db_utils as db_utils
 import utils.setup_utils as setup_utils
 from log.logger import LOG
 from utils.custom_types import ClanRole, SpecialChannel, SpecialRole
@@ -157,10 +158,11 @@ async def unregister_primary_clan(interaction: discord.Interaction, tag: str):
 @app_commands.describe(season="Current Clash Royale season")
 async def finish_setup(interaction: discord.Interaction, season: int):
     """Once all roles and primary clans are set, use this command to complete the setup process."""
-    unset_clan_roles = setup_utils.get_unset_clan_roles()
-    unset_special_roles = setup_utils.get_unset_special_roles()
-    unset_special_channels = setup_utils.get_unset_special_channels()
-    is_primary_clan_set = setup_utils.is_primary_clan_set()
+    with db_utils.db_session(read_only=True) as cursor:
+        unset_clan_roles = setup_utils.get_unset_clan_roles(cursor)
+        unset_special_roles = setup_utils.get_unset_special_roles(cursor)
+        unset_special_channels = setup_utils.get_unset_special_channels(cursor)
+        is_primary_clan_set = setup_utils.is_primary_clan_set(cursor)
 
     if unset_clan_roles:
         embed = discord.Embed(title="Cannot complete setup yet. The following clan roles do not have Discord roles:",
@@ -232,7 +232,7 @@ def best_performing_decks(clan_tag: str=None, required_matches: int=10) -> List[
                                                                  FROM   clans
                                                                  WHERE  tag = %s))
         """
-        cursor.execute(query, (clan_tag))
+        cursor.execute(query, (clan_tag,))
 
     database.close()
 
@@ -3,7 +3,8 @@
 import datetime
 import re
 import requests
-from typing import Dict, List, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
 
 import utils.db_utils as db_utils
 from config.credentials import CLASH_API_KEY
@@ -26,6 +27,9 @@ from utils.custom_types import (
 )
 from utils.exceptions import GeneralAPIError, ResourceNotFound
 
+MAX_BATTLE_LOG_WORKERS = 8
+"""Maximum number of battle logs to request from the API in parallel."""
+
 def process_clash_royale_tag(input: str) -> Union[str, None]:
     """Take a user's input and validate that it's a valid Supercell tag.
     
@@ -880,7 +884,8 @@ def interpret_boat_battle(raw_battle: dict) -> BoatBattle:
 def get_battle_day_stats(player_tag: str,
                          clan_tag: str,
                          last_check: datetime.datetime,
-                         current_time: datetime.datetime) -> Tuple[BattleStats, Battles]:
+                         current_time: datetime.datetime,
+                         session: Optional[requests.Session]=None) -> Tuple[BattleStats, Battles]:
     """Get wins/losses of each River Race game mode for a user.
 
     Args:
@@ -888,6 +893,7 @@ def get_battle_day_stats(player_tag: str,
         clan_tag: Only consider matches played while in this clan.
         last_check: Only consider matches played on or after this time.
         current_time: Only consider matches played before this time.
+        session: Session to send the request with. If not provided, send a standalone request.
 
     Returns:
         Tuple of the user's stats and their battles.
@@ -897,8 +903,9 @@ def get_battle_day_stats(player_tag: str,
         ResourceNotFound: Invalid tag was provided.
     """
     LOG.info(log_message("Getting battle log of user", player_tag=player_tag, clan_tag=clan_tag, last_check=last_check))
-    req = requests.get(url=f"https://api.clashroyale.com/v1/players/%23{player_tag[1:]}/battlelog",
-                       headers={"Accept": "application/json", "authorization": f"Bearer {CLASH_API_KEY}"})
+    http = session if session is not None else requests
+    req = http.get(url=f"https://api.clashroyale.com/v1/players/%23{player_tag[1:]}/battlelog",
+                   headers={"Accept": "application/json", "authorization": f"Bearer {CLASH_API_KEY}"})
 
     if req.status_code != 200:
         LOG.warning(log_message(msg="Bad request", status_code=req.status_code))
@@ -978,6 +985,37 @@ def get_battle_day_stats(player_tag: str,
     return (stats, battles)
 
 
+def get_battle_day_stats_many(player_checks: List[Tuple[str, datetime.datetime]],
+                              clan_tag: str,
+                              current_time: datetime.datetime) -> List[Union[Tuple[BattleStats, Battles], None]]:
+    """Get wins/losses of each River Race game mode for multiple users. Battle logs are requested in parallel over a shared
+       session.
+
+    Args:
+        player_checks: List of player tags and the time to start considering each player's matches from.
+        clan_tag: Only consider matches played while in this clan.
+        current_time: Only consider matches played before this time.
+
+    Returns:
+        List of each user's stats and battles in the same order as player_checks. Entries are None for users whose battle log
+        could not be retrieved.
+
+    Raises:
+        ResourceNotFound: Invalid tag was provided.
+    """
+    def get_stats(player_tag: str, last_check: datetime.datetime) -> Union[Tuple[BattleStats, Battles], None]:
+        try:
+            return get_battle_day_stats(player_tag, clan_tag, last_check, current_time, session)
+        except GeneralAPIError:
+            LOG.warning(log_message("Failed to get stats", player_tag=player_tag, clan_tag=clan_tag, last_check=last_check))
+            return None
+
+    with requests.Session() as session, ThreadPoolExecutor(max_workers=MAX_BATTLE_LOG_WORKERS) as executor:
+        return list(executor.map(get_stats,
+                                 [player_tag for player_tag, _ in player_checks],
+                                 [last_check for _, last_check in player_checks]))
+
+
 def battled_for_other_clan(player_tag: str, clan_tag: str, time: datetime.datetime) -> int:
     """Check if a user has already used war decks today for a different clan.
 
@@ -172,7 +172,8 @@ class UserStrikeData(TypedDict):
 
 
 class RiverRaceUserData(TypedDict):
-    """Dictionary representing row from river_race_user_data table."""
+    """Dictionary representing row from river_race_user_data table, along with the name and tag of the user it belongs to. The
+       day_N_in_clan values are only present when requested along with the River Race's reset times."""
     clan_affiliation_id: int
     river_race_id: int
     last_check: datetime.datetime
@@ -210,6 +211,12 @@ class RiverRaceUserData(TypedDict):
     day_5_outside_battles: Union[int, None]
     day_6_outside_battles: Union[int, None]
     day_7_outside_battles: Union[int, None]
+    name: Union[str, None]
+    tag: Union[str, None]
+    day_4_in_clan: bool
+    day_5_in_clan: bool
+    day_6_in_clan: bool
+    day_7_in_clan: bool
 
 
 class KickData(TypedDict):
@@ -1,10 +1,14 @@
 """Functions that interface with the database."""
 
+import bisect
 import datetime
+import functools
 import os
+import queue
 import requests
+from contextlib import contextmanager
 from enum import Enum
-from typing import Dict, List, Optional, Set, Tuple, Union
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
 import discord
 import pymysql
@@ -37,6 +41,7 @@ from utils.custom_types import (
     PrimaryClan,
     PvPBattle,
     ReminderTime,
+    RiverRaceClan,
     RiverRaceUserData,
     SpecialChannel,
     SpecialRole,
@@ -46,18 +51,143 @@ from utils.outside_battles_queue import UNSENT_WARNINGS
 
 EXPORT_PATH = "export_data"
 CARD_IMAGE_PATH = "card_images"
+MAX_POOLED_CONNECTIONS = 8
+"""Maximum number of idle database connections kept open for reuse."""
+RIVER_RACE_CACHE_DURATION = datetime.timedelta(seconds=30)
+"""How long results of per clan River Race lookups are cached before querying the database again."""
+RIVER_RACE_CACHE: Dict[Tuple[str, str], Tuple[datetime.datetime, Any]] = {}
+"""Cached River Race lookup results keyed by function name and clan tag, along with the time each result was cached."""
+BATTLE_DAY_STAT_KEYS = ("regular_wins", "regular_losses", "special_wins", "special_losses", "duel_wins", "duel_losses",
+                        "series_wins", "series_losses", "boat_wins", "boat_losses")
+"""Columns of river_race_user_data that are incremented by each Battle Day stats check."""
+
+class PooledConnection(pymysql.connections.Connection):
+    """Database connection that is returned to the connection pool when closed instead of disconnecting."""
+    in_pool = False
+    in_transaction = False
+
+    def query(self, sql, unbuffered=False):
+        """Execute a query and note that a transaction may now be open."""
+        self.in_transaction = True
+        return super().query(sql, unbuffered)
+
+    def commit(self):
+        """Commit the current transaction."""
+        super().commit()
+        self.in_transaction = False
+
+    def rollback(self):
+        """Roll back the current transaction."""
+        super().rollback()
+        self.in_transaction = False
+
+    def close(self):
+        """Roll back any uncommitted changes and return this connection to the pool. If the pool is full or the connection is
+           no longer usable, disconnect instead. Nothing is sent to the server if no statements were run since the last commit.
+        """
+        if self.in_pool:
+            return
+
+        try:
+            if self.in_transaction:
+                self.rollback()
+
+            CONNECTION_POOL.put_nowait(self)
+            self.in_pool = True
+        except (pymysql.err.Error, queue.Full):
+            try:
+                super().close()
+            except pymysql.err.Error:
+                pass
+
+
+CONNECTION_POOL: "queue.LifoQueue[PooledConnection]" = queue.LifoQueue(MAX_POOLED_CONNECTIONS)
+"""Idle database connections available for reuse."""
 
 def get_database_connection() -> Tuple[pymysql.Connection, DictCursor]:
-    """Establish connection to database.
+    """Get a connection to the database. Reuse an idle connection from the pool if one is available, otherwise establish a new
+       connection. Closing the connection returns it to the pool.
 
     Returns:
         Database connection and cursor.
     """
-    database = pymysql.connect(host=IP, user=USERNAME, password=PASSWORD, database=DATABASE_NAME, charset='utf8mb4')
+    try:
+        database = CONNECTION_POOL.get_nowait()
+        database.in_pool = False
+        database.ping(reconnect=True)
+    except queue.Empty:
+        database = PooledConnection(host=IP, user=USERNAME, password=PASSWORD, database=DATABASE_NAME, charset='utf8mb4')
+
     cursor = database.cursor(pymysql.cursors.DictCursor)
     return (database, cursor)
 
 
+@contextmanager
+def db_session(cursor: Optional[DictCursor]=None, read_only: bool=False) -> Iterator[DictCursor]:
+    """Get a cursor to run a group of statements in a single transaction.
+
+    Args:
+        cursor: Cursor used to interact with database. If not provided, a new connection is created, then committed and closed when
+                the block exits. Otherwise, the provided cursor is reused and the caller is responsible for committing its changes.
+        read_only: Whether the block only reads data. If so, skip the commit when the block exits.
+
+    Yields:
+        Cursor to execute statements with.
+    """
+    if cursor is not None:
+        yield cursor
+        return
+
+    database, cursor = get_database_connection()
+
+    try:
+        yield cursor
+
+        if not read_only:
+            database.commit()
+    finally:
+        database.close()
+
+
+def cache_river_race_lookup(lookup: Callable[[str], Any]) -> Callable[[str], Any]:
+    """Decorator that caches the result of a River Race lookup per clan until it expires or clear_river_race_cache is called.
+
+    Args:
+        lookup: River Race lookup to cache the result of.
+
+    Returns:
+        Wrapped River Race lookup.
+    """
+    @functools.wraps(lookup)
+    def wrapper(tag: str) -> Any:
+        now = datetime.datetime.utcnow()
+        key = (lookup.__name__, tag)
+        cached = RIVER_RACE_CACHE.get(key)
+
+        if cached is not None and now - cached[0] < RIVER_RACE_CACHE_DURATION:
+            return cached[1]
+
+        result = lookup(tag)
+        RIVER_RACE_CACHE[key] = (now, result)
+        return result
+
+    return wrapper
+
+
+def clear_river_race_cache(tags: Optional[List[str]]=None):
+    """Clear cached River Race lookup results. Must be called whenever a clan's river_races entry is modified.
+
+    Args:
+        tags: Tags of clans to clear cached results of. If not provided, clear results of all clans.
+    """
+    if tags is None:
+        RIVER_RACE_CACHE.clear()
+        return
+
+    for key in [key for key in RIVER_RACE_CACHE if key[1] in tags]:
+        del RIVER_RACE_CACHE[key]
+
+
 ###################################################################################################################
 #    _   _                 ___                     _   _                ___   _           _       _               #
 #   | | | |___  ___ _ __  |_ _|_ __  ___  ___ _ __| |_(_) ___  _ __    / / | | |_ __   __| | __ _| |_ ___  ___    #
@@ -86,10 +216,9 @@ def insert_clan(tag: str, name: str, cursor: Optional[pymysql.cursors.DictCursor
         database, cursor = get_database_connection()
 
     cursor.execute("INSERT INTO clans (tag, name, discord_role_id) VALUES (%s, %s, %s)\
-                    ON DUPLICATE KEY UPDATE name = %s",
+                    ON DUPLICATE KEY UPDATE name = %s, id = LAST_INSERT_ID(id)",
                    (tag, name, get_special_role_id(SpecialRole.Visitor), name))
-    cursor.execute("SELECT id FROM clans WHERE tag = %s", (tag))
-    id = cursor.fetchone()["id"]
+    id = cursor.lastrowid
 
     if close_connection:
         database.commit()
@@ -175,7 +304,7 @@ def update_clan_affiliation(clash_data: ClashData, cursor: Optional[pymysql.curs
 
                     if outside_battles > 0:
                         cursor.execute("SELECT day_4, day_5, day_6, day_7 FROM river_races WHERE id = %s",
-                                       (clash_data["river_race_id"]))
+                                       (clash_data["river_race_id"],))
 
                         query_result = cursor.fetchone()
                         outside_battles_key = None
@@ -211,9 +340,9 @@ def update_clan_affiliation(clash_data: ClashData, cursor: Optional[pymysql.curs
 
         if current_affiliation_id is not None:
             cursor.execute("UPDATE clan_time SET end = CURRENT_TIMESTAMP WHERE clan_affiliation_id = %s AND end IS NULL",
-                           (current_affiliation_id))
+                           (current_affiliation_id,))
         if new_affiliation_id is not None:
-            cursor.execute("INSERT INTO clan_time (clan_affiliation_id) VALUES (%s)", (new_affiliation_id))
+            cursor.execute("INSERT INTO clan_time (clan_affiliation_id) VALUES (%s)", (new_affiliation_id,))
 
     if close_connection:
         database.commit()
@@ -321,7 +450,7 @@ def update_banned_user(tag: str):
     """
     LOG.info(f"Updating banned user with tag {tag}")
     database, cursor = get_database_connection()
-    cursor.execute("SELECT id FROM users WHERE tag = %s", (tag))
+    cursor.execute("SELECT id FROM users WHERE tag = %s", (tag,))
     query_result = cursor.fetchone()
 
     if query_result is None:
@@ -329,7 +458,7 @@ def update_banned_user(tag: str):
         return
 
     user_id = query_result["id"]
-    cursor.execute("UPDATE users SET needs_update = FALSE WHERE id = %s", (user_id))
+    cursor.execute("UPDATE users SET needs_update = FALSE WHERE id = %s", (user_id,))
     clash_data = {"user_id": user_id, "clan_tag": None}
 
     update_clan_affiliation(clash_data, cursor)
@@ -345,7 +474,7 @@ def dissociate_discord_info_from_user(member: discord.Member):
         member: Discord member that just left the server.
     """
     database, cursor = get_database_connection()
-    cursor.execute("UPDATE users SET discord_id = NULL, discord_name = NULL WHERE discord_id = %s", (member.id))
+    cursor.execute("UPDATE users SET discord_id = NULL, discord_name = NULL WHERE discord_id = %s", (member.id,))
     database.commit()
     database.close()
 
@@ -372,8 +501,8 @@ def clear_update_flag(discord_id: int) -> Union[str, None]:
         Current in-game username of specified user, or None if user is not in database.
     """
     database, cursor = get_database_connection()
-    cursor.execute("UPDATE users SET needs_update = FALSE WHERE discord_id = %s", (discord_id))
-    cursor.execute("SELECT name FROM users WHERE discord_id = %s", (discord_id))
+    cursor.execute("UPDATE users SET needs_update = FALSE WHERE discord_id = %s", (discord_id,))
+    cursor.execute("SELECT name FROM users WHERE discord_id = %s", (discord_id,))
     query_result = cursor.fetchone()
     database.commit()
     database.close()
@@ -514,14 +643,14 @@ def get_user_in_database(search_key: Union[int, str]) -> List[Tuple[str, str, Un
     search_results = []
 
     if isinstance(search_key, int):
-        cursor.execute("SELECT id, tag, name FROM users WHERE discord_id = %s", (search_key))
+        cursor.execute("SELECT id, tag, name FROM users WHERE discord_id = %s", (search_key,))
         users = cursor.fetchall()
     else:
-        cursor.execute("SELECT id, tag, name FROM users WHERE tag = %s", (search_key))
+        cursor.execute("SELECT id, tag, name FROM users WHERE tag = %s", (search_key,))
         users = cursor.fetchall()
 
         if not users:
-            cursor.execute("SELECT id, tag, name FROM users WHERE name = %s", (search_key))
+            cursor.execute("SELECT id, tag, name FROM users WHERE name = %s", (search_key,))
             users = cursor.fetchall()
 
     for user in users:
@@ -603,21 +732,20 @@ def get_clan_affiliation(member: discord.Member) -> Union[Tuple[str, bool, ClanR
         Tuple of user's clan tag, whether they're in a primary clan, and role in that clan, or None if they are not in a clan.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT clans.tag AS tag, clans.id AS clan_id, clan_affiliations.role AS role FROM users\
+    cursor.execute("SELECT clans.tag AS tag, primary_clans.clan_id IS NOT NULL AS in_primary_clan, clan_affiliations.role AS role\
+                    FROM users\
                     INNER JOIN clan_affiliations ON users.id = clan_affiliations.user_id\
                     INNER JOIN clans ON clans.id = clan_affiliations.clan_id\
+                    LEFT JOIN primary_clans ON primary_clans.clan_id = clans.id\
                     WHERE users.discord_id = %s AND clan_affiliations.role IS NOT NULL",
-                   (member.id))
+                   (member.id,))
     query_result = cursor.fetchone()
+    database.close()
 
     if query_result is None:
-        database.close()
         return None
 
-    cursor.execute("SELECT clan_id FROM primary_clans WHERE clan_id = %s", (query_result["clan_id"]))
-    database.close()
-
-    return (query_result["tag"], cursor.fetchone() is not None, ClanRole(query_result["role"]))
+    return (query_result["tag"], bool(query_result["in_primary_clan"]), ClanRole(query_result["role"]))
 
 
 def get_all_clan_affiliations() -> List[Tuple[str, str, Union[str, None], Union[ClanRole, None]]]:
@@ -647,36 +775,38 @@ def get_all_clan_affiliations() -> List[Tuple[str, str, Union[str, None], Union[
     return clan_affiliations
 
 
-def get_clan_river_race_ids(tag: str, n: int=0) -> Tuple[int, int, int, int]:
+def get_clan_river_race_ids(tag: str,
+                            n: int=0,
+                            cursor: Optional[pymysql.cursors.DictCursor]=None) -> Tuple[int, int, int, int]:
     """Get a clan's current River Race entry id, clan_id, season_id, and week.
 
     Args:
         tag: Tag of clan to get IDs of.
         n: How many River races back to get IDs of. 0 is current race, 1 is previous race, etc.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
 
     Returns:
         Tuple of id, clan_id, season_id, and week of most recent River Race entry of specified clan, or None if no entry exists.
     """
-    database, cursor = get_database_connection()
     river_race = None
-    cursor.execute("SELECT MAX(id) AS id FROM seasons")
-    season_id = cursor.fetchone()["id"]
-
-    while n >= 0 and season_id > 0:
-        cursor.execute("SELECT id, clan_id, season_id, week FROM river_races WHERE\
-                        clan_id = (SELECT id FROM clans WHERE tag = %s) AND season_id = %s",
-                       (tag, season_id))
-        query_result = cursor.fetchall()
-
-        if n < len(query_result):
-            query_result.sort(key=lambda x: x["week"], reverse=True)
-            river_race = query_result[n]
-            break
-        else:
-            season_id -= 1
-            n -= len(query_result)
-    
-    database.close()
+
+    with db_session(cursor, read_only=True) as cursor:
+        cursor.execute("SELECT MAX(id) AS id FROM seasons")
+        season_id = cursor.fetchone()["id"]
+
+        while n >= 0 and season_id > 0:
+            cursor.execute("SELECT id, clan_id, season_id, week FROM river_races WHERE\
+                            clan_id = (SELECT id FROM clans WHERE tag = %s) AND season_id = %s",
+                           (tag, season_id))
+            query_result = cursor.fetchall()
+
+            if n < len(query_result):
+                query_result.sort(key=lambda x: x["week"], reverse=True)
+                river_race = query_result[n]
+                break
+            else:
+                season_id -= 1
+                n -= len(query_result)
 
     river_race_id = None
     clan_id = None
@@ -692,6 +822,7 @@ def get_clan_river_race_ids(tag: str, n: int=0) -> Tuple[int, int, int, int]:
     return (river_race_id, clan_id, season_id, week)
 
 
+@cache_river_race_lookup
 def get_most_recent_reset_time(tag: str) -> Union[datetime.datetime, None]:
     """Get the most recent daily reset time for the specified clan.
 
@@ -703,7 +834,7 @@ def get_most_recent_reset_time(tag: str) -> Union[datetime.datetime, None]:
     """
     river_race_id, _, _, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
-    cursor.execute("SELECT day_1, day_2, day_3, day_4, day_5, day_6, day_7 FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("SELECT day_1, day_2, day_3, day_4, day_5, day_6, day_7 FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     database.close()
     reset_times = [reset_time for reset_time in query_result.values() if reset_time is not None]
@@ -725,7 +856,7 @@ def get_user_reminder_times(reminder_time: ReminderTime) -> Dict[str, int]:
     if reminder_time == ReminderTime.ALL:
         cursor.execute("SELECT tag, discord_id FROM users")
     else:
-        cursor.execute("SELECT tag, discord_id FROM users WHERE reminder_time = %s", reminder_time.value)
+        cursor.execute("SELECT tag, discord_id FROM users WHERE reminder_time = %s", (reminder_time.value,))
 
     database.close()
     return {user["tag"]: user["discord_id"] for user in cursor}
@@ -741,7 +872,7 @@ def get_clan_name(tag: str) -> Union[str, None]:
         Name of clan, or None if clan not in database.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT name FROM clans WHERE tag = %s", tag)
+    cursor.execute("SELECT name FROM clans WHERE tag = %s", (tag,))
     query_result = cursor.fetchone()
     database.close()
 
@@ -761,7 +892,7 @@ def get_player_report_data(tag: str) -> DatabaseReport:
         Relevant data of user from database.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT discord_name, strikes FROM users WHERE tag = %s", (tag))
+    cursor.execute("SELECT discord_name, strikes FROM users WHERE tag = %s", (tag,))
     query_result = cursor.fetchone()
     database.close()
 
@@ -791,7 +922,7 @@ def get_discord_id_from_player_tag(tag: str) -> Optional[int]:
         Discord ID of user, or None if they are not registered on Discord.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT discord_id FROM users WHERE tag = %s", (tag))
+    cursor.execute("SELECT discord_id FROM users WHERE tag = %s", (tag,))
     query_result = cursor.fetchone()
     database.close()
 
@@ -854,7 +985,7 @@ def get_clan_role_id(clan_role: ClanRole) -> Union[int, None]:
         ID of associated Discord role, or None if no Discord role is assigned.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT discord_role_id FROM clan_role_discord_roles WHERE role = %s", (clan_role.value))
+    cursor.execute("SELECT discord_role_id FROM clan_role_discord_roles WHERE role = %s", (clan_role.value,))
     query_result = cursor.fetchone()
     database.close()
     role_id = query_result["discord_role_id"] if query_result is not None else None
@@ -871,7 +1002,7 @@ def get_special_role_id(special_role: SpecialRole) -> Union[int, None]:
         ID of associated Discord role, or None if no Discord role is assigned.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT discord_role_id FROM special_discord_roles WHERE role = %s", (special_role.value))
+    cursor.execute("SELECT discord_role_id FROM special_discord_roles WHERE role = %s", (special_role.value,))
     query_result = cursor.fetchone()
     database.close()
     role_id = query_result["discord_role_id"] if query_result is not None else None
@@ -888,7 +1019,7 @@ def get_special_channel_id(special_channel: SpecialChannel) -> Union[int, None]:
         ID of associated Discord channel, or None if no Discord channel is assigned.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT discord_channel_id FROM special_discord_channels WHERE channel = %s", (special_channel.value))
+    cursor.execute("SELECT discord_channel_id FROM special_discord_channels WHERE channel = %s", (special_channel.value,))
     query_result = cursor.fetchone()
     database.close()
     channel_id = query_result["discord_channel_id"] if query_result is not None else None
@@ -907,7 +1038,7 @@ def get_clan_affiliated_channel_id(tag: str) -> Union[int, None]:
     database, cursor = get_database_connection()
     cursor.execute("SELECT discord_channel_id FROM primary_clans INNER JOIN clans ON primary_clans.clan_id = clans.id\
                     WHERE tag = %s",
-                   (tag))
+                   (tag,))
     query_result = cursor.fetchone()
     database.close()
 
@@ -927,11 +1058,11 @@ def get_clan_affiliated_role_id(tag: str) -> Union[int, None]:
         ID of role for specified clan. If clan is not in database, return Visitor role ID. If no Visitor role is set, then None.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT discord_role_id FROM clans WHERE tag = %s", (tag))
+    cursor.execute("SELECT discord_role_id FROM clans WHERE tag = %s", (tag,))
     query_result = cursor.fetchone()
 
     if query_result is None:
-        cursor.execute("SELECT discord_role_id FROM special_discord_roles WHERE role = %s", (SpecialRole.Visitor.value))
+        cursor.execute("SELECT discord_role_id FROM special_discord_roles WHERE role = %s", (SpecialRole.Visitor.value,))
         query_result = cursor.fetchone()
 
         if query_result is None:
@@ -959,7 +1090,7 @@ def tracks_stats(tag: str) -> bool:
     database, cursor = get_database_connection()
     cursor.execute("SELECT track_stats FROM primary_clans INNER JOIN clans ON primary_clans.clan_id = clans.id\
                     WHERE clans.tag = %s",
-                   (tag))
+                   (tag,))
     query_result = cursor.fetchone()
     database.close()
 
@@ -969,6 +1100,7 @@ def tracks_stats(tag: str) -> bool:
     return query_result["track_stats"]
 
 
+@cache_river_race_lookup
 def get_last_check(tag: str) -> datetime.datetime:
     """Get last time that Battle Day stats were checked for the specified clan.
 
@@ -977,12 +1109,35 @@ def get_last_check(tag: str) -> datetime.datetime:
     """
     river_race_id, _, _, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
-    cursor.execute("SELECT last_check FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("SELECT last_check FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     database.close()
     return query_result["last_check"]
 
 
+def get_last_checks(tags: List[str], cursor: Optional[pymysql.cursors.DictCursor]=None) -> Dict[str, datetime.datetime]:
+    """Get last time that Battle Day stats were checked for each of the specified clans.
+
+    Args:
+        tags: Tags of clans to get last check times of.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+
+    Returns:
+        Dictionary mapping clan tags to the time of their last check. Clans without a River Race entry are omitted.
+    """
+    if not tags:
+        return {}
+
+    with db_session(cursor, read_only=True) as cursor:
+        cursor.execute("SELECT clans.tag AS tag, river_races.last_check AS last_check FROM river_races\
+                        INNER JOIN clans ON clans.id = river_races.clan_id\
+                        WHERE clans.tag IN %s AND (river_races.season_id, river_races.week) =\
+                            (SELECT season_id, week FROM river_races AS latest WHERE latest.clan_id = river_races.clan_id\
+                             ORDER BY season_id DESC, week DESC LIMIT 1)",
+                       (tags,))
+        return {clan["tag"]: clan["last_check"] for clan in cursor}
+
+
 def set_last_check(tag: str) -> datetime.datetime:
     """Set the last check time to current timestamp for the specified clan.
 
@@ -994,11 +1149,12 @@ def set_last_check(tag: str) -> datetime.datetime:
     """
     river_race_id, _, _, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
-    cursor.execute("UPDATE river_races SET last_check = CURRENT_TIMESTAMP WHERE id = %s", (river_race_id))
-    cursor.execute("SELECT last_check FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("UPDATE river_races SET last_check = CURRENT_TIMESTAMP WHERE id = %s", (river_race_id,))
+    cursor.execute("SELECT last_check FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     database.commit()
     database.close()
+    clear_river_race_cache([tag])
     return query_result["last_check"]
 
 
@@ -1010,7 +1166,7 @@ def set_battle_time(tag: str):
     """
     river_race_id, _, _, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
-    cursor.execute("UPDATE river_races SET battle_time = TRUE WHERE id = %s", (river_race_id))
+    cursor.execute("UPDATE river_races SET battle_time = TRUE WHERE id = %s", (river_race_id,))
     database.commit()
     database.close()
 
@@ -1026,7 +1182,7 @@ def is_battle_time(tag: str) -> bool:
     """
     river_race_id, _, _, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
-    cursor.execute("SELECT battle_time FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("SELECT battle_time FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     database.close()
 
@@ -1036,6 +1192,7 @@ def is_battle_time(tag: str) -> bool:
     return query_result["battle_time"]
 
 
+@cache_river_race_lookup
 def is_colosseum_week(tag: str) -> bool:
     """Check if it's currently a Colosseum week.
 
@@ -1047,7 +1204,7 @@ def is_colosseum_week(tag: str) -> bool:
     """
     river_race_id, _, _, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
-    cursor.execute("SELECT colosseum_week FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("SELECT colosseum_week FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     database.close()
     return query_result["colosseum_week"]
@@ -1078,7 +1235,7 @@ def is_completed_saturday(tag: str) -> bool:
     """
     river_race_id, _, _, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
-    cursor.execute("SELECT completed_saturday FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("SELECT completed_saturday FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     database.close()
     return query_result["completed_saturday"]
@@ -1119,41 +1276,51 @@ def prepare_for_battle_days(tag: str):
         LOG.warning(f"Unable to get clans during battle day preparations for clan {tag}")
 
 
-def update_river_race_clans(tag: str):
+def update_river_race_clans(tag: str,
+                            cursor: Optional[pymysql.cursors.DictCursor]=None,
+                            clans_in_race: Optional[Dict[str, RiverRaceClan]]=None):
     """Insert/update clans used for predictions for a primary clan. If they already exist for the current season, don't do anything.
 
     Args:
         tag: Tag of clan to insert River Race clans for.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+                Caller is responsible for committing changes made by cursor if provided, then calling clear_river_race_cache.
+        clans_in_race: Current stats of the clans in the River Race. If not provided, get them from the API.
 
     Raises:
         GeneralAPIError: Something went wrong with the request.
     """
-    _, clan_id, season_id, _ = get_clan_river_race_ids(tag)
-    database, cursor = get_database_connection()
-    clans_in_race = clash_utils.get_clans_in_race(tag, False)
-    cursor.execute("SELECT id FROM river_race_clans WHERE clan_id = %s AND season_id = %s", (clan_id, season_id))
-    insert_new_clans = not bool(cursor.fetchall())
+    if clans_in_race is None:
+        clans_in_race = clash_utils.get_clans_in_race(tag, False)
+
+    cursor_provided = cursor is not None
+
+    with db_session(cursor) as cursor:
+        _, clan_id, season_id, _ = get_clan_river_race_ids(tag, cursor=cursor)
+        cursor.execute("SELECT id FROM river_race_clans WHERE clan_id = %s AND season_id = %s", (clan_id, season_id))
+        insert_new_clans = not bool(cursor.fetchall())
 
-    for clan_tag, clan in clans_in_race.items():
         if insert_new_clans:
-            LOG.info(log_message("Inserting River Race clan",
+            LOG.info(log_message("Inserting River Race clans",
                                  clan_id=clan_id,
                                  season_id=season_id,
-                                 clan_tag=clan_tag))
-            cursor.execute("INSERT INTO river_race_clans (clan_id, season_id, tag, name, current_race_total_decks) VALUES\
-                            (%s, %s, %s, %s, %s)",
-                           (clan_id, season_id, clan_tag, clan["name"], clan["total_decks_used"]))
+                                 clan_tags=list(clans_in_race)))
+            cursor.executemany("INSERT INTO river_race_clans (clan_id, season_id, tag, name, current_race_total_decks) VALUES\
+                                (%s, %s, %s, %s, %s)",
+                               [(clan_id, season_id, clan_tag, clan["name"], clan["total_decks_used"])
+                                for clan_tag, clan in clans_in_race.items()])
         else:
-            LOG.info(log_message("Updating River Race clan",
+            LOG.info(log_message("Updating River Race clans",
                                  clan_id=clan_id,
                                  season_id=season_id,
-                                 clan_tag=clan_tag))
-            cursor.execute("UPDATE river_race_clans SET current_race_medals = 0, current_race_total_decks = %s\
-                            WHERE clan_id = %s AND season_id = %s AND tag = %s",
-                           (clan["total_decks_used"], clan_id, season_id, clan_tag))
+                                 clan_tags=list(clans_in_race)))
+            cursor.executemany("UPDATE river_race_clans SET current_race_medals = 0, current_race_total_decks = %s\
+                                WHERE clan_id = %s AND season_id = %s AND tag = %s",
+                               [(clan["total_decks_used"], clan_id, season_id, clan_tag)
+                                for clan_tag, clan in clans_in_race.items()])
 
-    database.commit()
-    database.close()
+    if not cursor_provided:
+        clear_river_race_cache([tag])
 
 
 def set_clan_reset_time(tag: str, weekday: int):
@@ -1176,9 +1343,10 @@ def set_clan_reset_time(tag: str, weekday: int):
 
     database, cursor = get_database_connection()
     reset_time_query = f"UPDATE river_races SET {day_key} = CURRENT_TIMESTAMP WHERE id = %s"
-    cursor.execute(reset_time_query, (river_race_id))
+    cursor.execute(reset_time_query, (river_race_id,))
     database.commit()
     database.close()
+    clear_river_race_cache([tag])
 
 
 def record_deck_usage_today(tag: str, weekday: int, deck_usage: Dict[str, Tuple[int, int]]):
@@ -1204,12 +1372,11 @@ def record_deck_usage_today(tag: str, weekday: int, deck_usage: Dict[str, Tuple[
     active_key = day_key + "_active"
     locked_key = day_key + "_locked"
     active_members = clash_utils.get_active_members_in_clan(tag)
+    last_check = get_last_check(tag)
 
     database, cursor = get_database_connection()
     reset_time_query = f"UPDATE river_races SET {day_key} = CURRENT_TIMESTAMP WHERE id = %s"
-    cursor.execute(reset_time_query, (river_race_id))
-
-    last_check = get_last_check(tag)
+    cursor.execute(reset_time_query, (river_race_id,))
 
     if day_key in {"day_4", "day_5", "day_6", "day_7"}:
         update_usage_query = ("INSERT INTO river_race_user_data "
@@ -1234,7 +1401,7 @@ def record_deck_usage_today(tag: str, weekday: int, deck_usage: Dict[str, Tuple[
     max_participation = len([decks_used for (decks_used, _) in deck_usage.values() if decks_used > 0]) == 50
 
     for player_tag, (decks_used, _) in deck_usage.items():
-        cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag))
+        cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag,))
         query_result = cursor.fetchone()
 
         if query_result is None:
@@ -1246,7 +1413,7 @@ def record_deck_usage_today(tag: str, weekday: int, deck_usage: Dict[str, Tuple[
                 continue
 
             insert_new_user(clash_data, cursor=cursor)
-            cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag))
+            cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag,))
             query_result = cursor.fetchone()
 
         user_id = query_result["id"]
@@ -1271,33 +1438,78 @@ def record_deck_usage_today(tag: str, weekday: int, deck_usage: Dict[str, Tuple[
 
     database.commit()
     database.close()
+    clear_river_race_cache([tag])
+
+
+def get_medal_counts_for_clans(tags: List[str],
+                               cursor: Optional[pymysql.cursors.DictCursor]=None) -> Dict[str, Dict[str, Tuple[int, datetime.datetime]]]:
+    """Get the current medal count and last check time of each user in each of the specified clans.
+
+    Args:
+        tags: Tags of clans to get data from.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+
+    Returns:
+        Dictionary mapping clan tags to dictionaries of player tags mapped to their medals and last check times for the current
+        River Race of that clan.
+    """
+    if not tags:
+        return {}
+
+    results = {tag: {} for tag in tags}
+
+    with db_session(cursor, read_only=True) as cursor:
+        cursor.execute("SELECT clans.tag AS clan_tag, users.tag AS tag, river_race_user_data.medals AS medals,\
+                               river_race_user_data.last_check AS last_check\
+                        FROM river_races\
+                        INNER JOIN clans ON clans.id = river_races.clan_id\
+                        INNER JOIN river_race_user_data ON river_race_user_data.river_race_id = river_races.id\
+                        INNER JOIN clan_affiliations ON clan_affiliations.id = river_race_user_data.clan_affiliation_id\
+                        INNER JOIN users ON users.id = clan_affiliations.user_id\
+                        WHERE clans.tag IN %s AND (river_races.season_id, river_races.week) =\
+                            (SELECT season_id, week FROM river_races AS latest WHERE latest.clan_id = river_races.clan_id\
+                             ORDER BY season_id DESC, week DESC LIMIT 1)",
+                       (tags,))
+
+        for user in cursor:
+            results[user["clan_tag"]][user["tag"]] = (user["medals"], user["last_check"])
+
+    return results
 
 
-def get_medal_counts(tag: str) -> Dict[str, Tuple[int, datetime.datetime]]:
-    """Get the current medal count and last check time of each user in a clan.
+def start_battle_day_check(tag: str) -> Tuple[Dict[str, Tuple[int, datetime.datetime]], datetime.datetime, datetime.datetime]:
+    """Get the data needed to check a clan's Battle Day stats and set its last check time to the current timestamp. All reads and
+       the update are performed in a single transaction.
 
     Args:
-        tag: Tag of clan to get data from.
+        tag: Tag of clan to start a check for.
 
     Returns:
-        Dictionary mapping player tags to their medals and last check times for the current River Race of the specified clan.
+        Dictionary mapping player tags to their medals and last check times, the clan's previous last check time, and the new last
+        check time.
     """
-    river_race_id, _, _, _ = get_clan_river_race_ids(tag)
+    with db_session() as cursor:
+        river_race_id, _, _, _ = get_clan_river_race_ids(tag, cursor=cursor)
 
-    if river_race_id is None:
-        LOG.warning(f"Could not find River Race entry for clan {tag}")
-        return []
+        if river_race_id is None:
+            LOG.warning(f"Could not find River Race entry for clan {tag}")
+            return ({}, None, None)
 
-    database, cursor = get_database_connection()
-    cursor.execute("SELECT users.tag AS tag, river_race_user_data.medals AS medals, river_race_user_data.last_check AS last_check\
-                    FROM users\
-                    INNER JOIN clan_affiliations ON clan_affiliations.user_id = users.id\
-                    INNER JOIN river_race_user_data ON river_race_user_data.clan_affiliation_id = clan_affiliations.id\
-                    WHERE river_race_user_data.river_race_id = %s",
-                   (river_race_id))
-    database.close()
-    results = {user["tag"]: (user["medals"], user["last_check"]) for user in cursor}
-    return results
+        cursor.execute("SELECT users.tag AS tag, river_race_user_data.medals AS medals, river_race_user_data.last_check AS last_check\
+                        FROM users\
+                        INNER JOIN clan_affiliations ON clan_affiliations.user_id = users.id\
+                        INNER JOIN river_race_user_data ON river_race_user_data.clan_affiliation_id = clan_affiliations.id\
+                        WHERE river_race_user_data.river_race_id = %s",
+                       (river_race_id,))
+        medal_counts = {user["tag"]: (user["medals"], user["last_check"]) for user in cursor}
+        cursor.execute("SELECT last_check FROM river_races WHERE id = %s", (river_race_id,))
+        last_check = cursor.fetchone()["last_check"]
+        cursor.execute("UPDATE river_races SET last_check = CURRENT_TIMESTAMP WHERE id = %s", (river_race_id,))
+        cursor.execute("SELECT last_check FROM river_races WHERE id = %s", (river_race_id,))
+        current_time = cursor.fetchone()["last_check"]
+
+    clear_river_race_cache([tag])
+    return (medal_counts, last_check, current_time)
 
 
 def record_battle_day_stats(stats: List[Tuple[BattleStats, Battles, int]], last_check: datetime.datetime, api_is_broken: bool):
@@ -1319,6 +1531,7 @@ def record_battle_day_stats(stats: List[Tuple[BattleStats, Battles, int]], last_
         return
 
     database, cursor = get_database_connection()
+    stats_to_upsert: List[BattleStats] = []
 
     for user_stats, battles, medals in stats:
         user_stats["medals"] = medals
@@ -1349,53 +1562,7 @@ def record_battle_day_stats(stats: List[Tuple[BattleStats, Battles, int]], last_
             query_result = cursor.fetchone()
 
         user_stats["clan_affiliation_id"] = query_result["id"]
-        cursor.execute("INSERT INTO river_race_user_data (\
-                            clan_affiliation_id,\
-                            river_race_id,\
-                            last_check,\
-                            tracked_since,\
-                            medals,\
-                            regular_wins,\
-                            regular_losses,\
-                            special_wins,\
-                            special_losses,\
-                            duel_wins,\
-                            duel_losses,\
-                            series_wins,\
-                            series_losses,\
-                            boat_wins,\
-                            boat_losses\
-                        ) VALUES (\
-                            %(clan_affiliation_id)s,\
-                            %(river_race_id)s,\
-                            %(last_check)s,\
-                            CURRENT_TIMESTAMP,\
-                            %(medals)s,\
-                            %(regular_wins)s,\
-                            %(regular_losses)s,\
-                            %(special_wins)s,\
-                            %(special_losses)s,\
-                            %(duel_wins)s,\
-                            %(duel_losses)s,\
-                            %(series_wins)s,\
-                            %(series_losses)s,\
-                            %(boat_wins)s,\
-                            %(boat_losses)s\
-                        ) ON DUPLICATE KEY UPDATE\
-                            last_check = %(last_check)s,\
-                            tracked_since = COALESCE(tracked_since, CURRENT_TIMESTAMP),\
-                            medals = %(medals)s,\
-                            regular_wins = regular_wins + %(regular_wins)s,\
-                            regular_losses = regular_losses + %(regular_losses)s,\
-                            special_wins = special_wins + %(special_wins)s,\
-                            special_losses = special_losses + %(special_losses)s,\
-                            duel_wins = duel_wins + %(duel_wins)s,\
-                            duel_losses = duel_losses + %(duel_losses)s,\
-                            series_wins = series_wins + %(series_wins)s,\
-                            series_losses = series_losses + %(series_losses)s,\
-                            boat_wins = boat_wins + %(boat_wins)s,\
-                            boat_losses = boat_losses + %(boat_losses)s",
-                       user_stats)
+        stats_to_upsert.append(user_stats)
 
         for battle in battles["pvp_battles"]:
             insert_pvp_battle(battle, user_stats["clan_affiliation_id"], user_stats["river_race_id"], cursor, api_is_broken)
@@ -1406,6 +1573,18 @@ def record_battle_day_stats(stats: List[Tuple[BattleStats, Battles, int]], last_
         for boat_battle in battles["boat_battles"]:
             insert_boat_battle(boat_battle, user_stats["clan_affiliation_id"], user_stats["river_race_id"], cursor, api_is_broken)
 
+    if stats_to_upsert:
+        # Multi-row insert instead of executemany since pymysql can only batch executemany when every value is a placeholder.
+        columns = ("clan_affiliation_id", "river_race_id", "last_check", "medals") + BATTLE_DAY_STAT_KEYS
+        row = "(" + ", ".join(["%s"] * len(columns)) + ", CURRENT_TIMESTAMP)"
+        args = [user_stats[column] for user_stats in stats_to_upsert for column in columns]
+        increments = ", ".join(f"{key} = {key} + VALUES({key})" for key in BATTLE_DAY_STAT_KEYS)
+        cursor.execute(f"INSERT INTO river_race_user_data ({', '.join(columns)}, tracked_since) "
+                       f"VALUES {', '.join([row] * len(stats_to_upsert))} "
+                       "ON DUPLICATE KEY UPDATE last_check = VALUES(last_check), medals = VALUES(medals), "
+                       f"tracked_since = COALESCE(tracked_since, CURRENT_TIMESTAMP), {increments}",
+                       args)
+
     database.commit()
     database.close()
 
@@ -1519,8 +1698,7 @@ def insert_deck(deck: List[Card], cursor: pymysql.cursors.DictCursor, api_is_bro
 
     if query_result is None:
         cursor.execute("INSERT INTO decks VALUES (DEFAULT)")
-        cursor.execute("SELECT LAST_INSERT_ID() as deck_id")
-        deck_id = cursor.fetchone()["deck_id"]
+        deck_id = cursor.lastrowid
 
         for card in deck:
             card["deck_id"] = deck_id
@@ -1578,9 +1756,7 @@ def insert_pvp_battle(battle: PvPBattle, clan_affiliation_id: int, river_race_id
                     %(opp_pt2_hit_points)s)",
                    battle_dict)
 
-    cursor.execute("SELECT LAST_INSERT_ID() as id")
-    query_result = cursor.fetchone()
-    return query_result["id"]
+    return cursor.lastrowid
 
 
 def insert_duel(duel: Duel, clan_affiliation_id: int, river_race_id: int, cursor: pymysql.cursors.DictCursor, api_is_broken: bool):
@@ -1641,6 +1817,7 @@ def insert_boat_battle(boat_battle: BoatBattle, clan_affiliation_id: int, river_
                    boat_dict)
 
 
+@cache_river_race_lookup
 def get_current_season_river_race_clans(tag: str) -> Dict[str, DatabaseRiverRaceClan]:
     """Get the saved data for all clans in the specified clan's current season River Races.
 
@@ -1648,7 +1825,7 @@ def get_current_season_river_race_clans(tag: str) -> Dict[str, DatabaseRiverRace
         tag: Tag of clan to get saved data from.
 
     Returns:
-        Dictionary mapping clan tags to their saved data.
+        Dictionary mapping clan tags to their saved data. Results are cached and shared between callers, so they must not be modified.
     """
     _, clan_id, season_id, _ = get_clan_river_race_ids(tag)
     database, cursor = get_database_connection()
@@ -1657,46 +1834,69 @@ def get_current_season_river_race_clans(tag: str) -> Dict[str, DatabaseRiverRace
     return {clan["tag"]: clan for clan in cursor}
 
 
-def update_current_season_river_race_clans(updated_data: List[DatabaseRiverRaceClan]):
-    """Update saved data of River Race clans with latest data.
+def update_current_season_river_race_clans(tag: str, latest_clan_data: Dict[str, Tuple[int, int]]):
+    """Update saved data of the specified clan's current season River Race clans with their latest medals and deck usage. Season
+       totals are calculated by the database from the saved values, so all clans are updated with a single statement.
 
     Args:
-        updated_data: List of latest clan data to save.
+        tag: Tag of clan whose River Race clans should be updated.
+        latest_clan_data: Dictionary mapping tags of clans to update to their current race medals and current race total decks used.
     """
-    database, cursor = get_database_connection()
-    cursor.executemany("UPDATE river_race_clans SET\
-                        current_race_medals = %(current_race_medals)s,\
-                        total_season_medals = %(total_season_medals)s,\
-                        current_race_total_decks = %(current_race_total_decks)s,\
-                        total_season_battle_decks = %(total_season_battle_decks)s,\
-                        battle_days = %(battle_days)s\
-                        WHERE id = %(id)s",
-                       updated_data)
-    database.commit()
-    database.close()
+    if not latest_clan_data:
+        return
+
+    medals_case = "CASE tag " + " ".join(["WHEN %s THEN %s"] * len(latest_clan_data)) + " END"
+    medals_args = [value for clan_tag, (medals, _) in latest_clan_data.items() for value in (clan_tag, medals)]
+    decks_case = "CASE tag " + " ".join(["WHEN %s THEN %s"] * len(latest_clan_data)) + " END"
+    decks_args = [value for clan_tag, (_, total_decks) in latest_clan_data.items() for value in (clan_tag, total_decks)]
+
+    with db_session() as cursor:
+        _, clan_id, season_id, _ = get_clan_river_race_ids(tag, cursor=cursor)
+
+        # Assignments in a single table UPDATE are evaluated left to right, so the season totals must be updated before the current
+        # race values they are calculated from.
+        cursor.execute(f"UPDATE river_race_clans SET\
+                            total_season_medals = total_season_medals + ({medals_case}) - current_race_medals,\
+                            total_season_battle_decks = total_season_battle_decks + ({decks_case}) - current_race_total_decks,\
+                            current_race_medals = {medals_case},\
+                            current_race_total_decks = {decks_case},\
+                            battle_days = battle_days + 1\
+                        WHERE clan_id = %s AND season_id = %s AND tag IN %s",
+                       medals_args + decks_args + medals_args + decks_args + [clan_id, season_id, list(latest_clan_data)])
 
+    clear_river_race_cache([tag])
 
-def create_new_season():
-    """Create a new season index."""
+
+def create_new_season() -> int:
+    """Create a new season index.
+
+    Returns:
+        id of the newly created season.
+    """
     LOG.info("Creating new season")
-    database, cursor = get_database_connection()
-    cursor.execute("INSERT INTO seasons VALUES (DEFAULT, DEFAULT)")
-    database.commit()
-    database.close()
 
+    with db_session() as cursor:
+        cursor.execute("INSERT INTO seasons VALUES (DEFAULT, DEFAULT)")
+        return cursor.lastrowid
 
-def prepare_for_river_race(tag: str):
-    """Insert a new river_race entry for the specified clan.
+
+def prepare_for_river_races(tags: List[str],
+                            cursor: Optional[pymysql.cursors.DictCursor]=None,
+                            season_id: Optional[int]=None):
+    """Insert a new river_race entry for each of the specified clans.
 
     Args:
-        tag: Tag of clan to create entries for.
+        tags: Tags of clans to create entries for.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+                Caller is responsible for committing changes made by cursor if provided, then calling clear_river_race_cache.
+        season_id: ID of season to create entries in. If not provided, use the most recent season.
     """
-    LOG.info(f"Creating new river race entry for {tag}")
-    database, cursor = get_database_connection()
-    cursor.execute("SELECT id FROM clans WHERE tag = %s", (tag))
-    clan_id = cursor.fetchone()["id"]
-    cursor.execute("SELECT MAX(id) AS id FROM seasons")
-    season_id = cursor.fetchone()["id"]
+    if not tags:
+        return
+
+    cursor_provided = cursor is not None
+
+    LOG.info(f"Creating new river race entries for {', '.join(tags)}")
 
     week = 1
     delta = datetime.timedelta(days=7)
@@ -1708,20 +1908,28 @@ def prepare_for_river_race(tag: str):
         date -= delta
         week += 1
 
-    river_race_info = {
-        "clan_id": clan_id,
-        "season_id": season_id,
-        "week": week,
-        "colosseum_week": clash_utils.is_colosseum_week(),
-        "completed_saturday": False
-    }
+    colosseum_week = clash_utils.is_colosseum_week()
 
-    cursor.execute("INSERT INTO river_races (clan_id, season_id, week, start_time, colosseum_week, completed_saturday)\
-                    VALUES (%(clan_id)s, %(season_id)s, %(week)s, CURRENT_TIMESTAMP, %(colosseum_week)s, %(completed_saturday)s)",
-                   river_race_info)
+    with db_session(cursor) as cursor:
+        cursor.execute("SELECT id FROM clans WHERE tag IN %s", (tags,))
+        clan_ids = [clan["id"] for clan in cursor]
 
-    database.commit()
-    database.close()
+        if season_id is None:
+            cursor.execute("SELECT MAX(id) AS id FROM seasons")
+            season_id = cursor.fetchone()["id"]
+
+        if not clan_ids:
+            return
+
+        # Multi-row insert instead of executemany since pymysql can only batch executemany when every value is a placeholder.
+        values = ", ".join(["(%s, %s, %s, CURRENT_TIMESTAMP, %s, FALSE)"] * len(clan_ids))
+        args = [arg for clan_id in clan_ids for arg in (clan_id, season_id, week, colosseum_week)]
+        cursor.execute("INSERT INTO river_races (clan_id, season_id, week, start_time, colosseum_week, completed_saturday)\
+                        VALUES " + values,
+                       args)
+
+    if not cursor_provided:
+        clear_river_race_cache(tags)
 
 
 def get_stats(player_tag: str, clan_tag: Optional[str]=None) -> BattleStats:
@@ -1749,7 +1957,7 @@ def get_stats(player_tag: str, clan_tag: Optional[str]=None) -> BattleStats:
         "boat_wins": 0,
         "boat_losses": 0
     }
-    cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag))
+    cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag,))
     query_result = cursor.fetchone()
 
     if query_result is None:
@@ -1761,9 +1969,9 @@ def get_stats(player_tag: str, clan_tag: Optional[str]=None) -> BattleStats:
     if clan_tag is None:
         cursor.execute("SELECT * FROM river_race_user_data\
                         WHERE clan_affiliation_id IN (SELECT id FROM clan_affiliations WHERE user_id = %s)",
-                       (user_id))
+                       (user_id,))
     else:
-        cursor.execute("SELECT id FROM clans WHERE tag = %s", (clan_tag))
+        cursor.execute("SELECT id FROM clans WHERE tag = %s", (clan_tag,))
         query_result = cursor.fetchone()
 
         if query_result is None:
@@ -1814,7 +2022,7 @@ def time_in_clan(player_tag: str, clans: List[str]) -> datetime.timedelta:
              f"clan_id IN (SELECT id FROM clans WHERE tag IN ({clan_tags_str})))")
 
     database, cursor = get_database_connection()
-    cursor.execute(query, (player_tag))
+    cursor.execute(query, (player_tag,))
     time_in_clans = datetime.timedelta()
     now = datetime.datetime.utcnow()
 
@@ -1828,44 +2036,6 @@ def time_in_clan(player_tag: str, clans: List[str]) -> datetime.timedelta:
     return time_in_clans
 
 
-def get_clan_times(clan_affiliation_id: int) -> List[Tuple[datetime.datetime, Union[datetime.datetime, None]]]:
-    """Get a list of time periods that a user was in a clan.
-
-    Args:
-        clan_affiliation_id: ID of clan affiliation to check.
-
-    Return:
-        List of time ranges that user was in the clan. If they are currently in the clan, the end time of one entry will be None.
-    """
-    database, cursor = get_database_connection()
-    cursor.execute("SELECT * FROM clan_time WHERE clan_affiliation_id = %s", (clan_affiliation_id))
-    clan_times = [(time_range["start"], time_range["end"]) for time_range in cursor.fetchall()]
-    clan_times.sort(key=lambda time_range: time_range[0])
-    database.close()
-    return clan_times
-
-
-def get_name_and_tag_from_affiliation(clan_affiliation_id: int) -> Union[Tuple[str, str], Tuple[None, None]]:
-    """Get a user's player name and tag from their clan affiliation id.
-
-    Args:
-        clan_affiliation_id: Clan affiliation ID to get user data from.
-
-    Returns:
-        Tuple of the user's name and tag.
-    """
-    database, cursor = get_database_connection()
-    cursor.execute("SELECT name, tag FROM users WHERE id = (SELECT user_id FROM clan_affiliations WHERE id = %s)",
-                   (clan_affiliation_id))
-    database.close()
-    query_result = cursor.fetchone()
-
-    if query_result is None:
-        return (None, None)
-
-    return (query_result["name"], query_result["tag"])
-
-
 ########################################
 #    ____  _        _ _                #
 #   / ___|| |_ _ __(_) | _____  ___    #
@@ -1884,32 +2054,27 @@ def correct_reset_times(reset_times: List[Union[datetime.datetime, None]]) -> Li
     Returns:
         List of times with missing entries filled in, or empty list if not possible.
     """
-    times = reset_times.copy()
-
-    if not all(times):
-        if not any(times):
-            return []
+    times = list(reset_times)
+    known_indices = [i for i, time in enumerate(times) if time]
 
-        for i in range(len(times)):
-            if not times[i]:
-                next_index = (i + 1) % len(times)
+    if not known_indices:
+        return []
 
-                while next_index != i:
-                    if times[next_index]:
-                        diff = i - next_index
+    if len(known_indices) == len(times):
+        return times
 
-                        if diff > 0:
-                            times[i] = times[next_index] + datetime.timedelta(days=diff)
-                        else:
-                            times[i] = times[next_index] - datetime.timedelta(days=-diff)
-                    else:
-                        next_index = (next_index + 1) % len(times)
+    # Fill each missing day from the next known day after it, wrapping around to the first known day
+    for i, time in enumerate(times):
+        if time:
+            continue
 
-                if next_index == i:
-                    return []
+        position = bisect.bisect_right(known_indices, i)
+        next_index = known_indices[position] if position < len(known_indices) else known_indices[0]
+        times[i] = reset_times[next_index] + datetime.timedelta(days=i - next_index)
 
     return times
 
+
 def get_clan_strike_determination_data(tag: str) -> Union[ClanStrikeInfo, None]:
     """Get data needed from a clan's most recent River Race to determine who should receive a strike.
 
@@ -1926,11 +2091,11 @@ def get_clan_strike_determination_data(tag: str) -> Union[ClanStrikeInfo, None]:
     strike_info: ClanStrikeInfo = {}
     strike_info["river_race_id"] = river_race_id
 
-    cursor.execute("SELECT strike_threshold FROM primary_clans WHERE clan_id = %s", (clan_id))
+    cursor.execute("SELECT strike_threshold FROM primary_clans WHERE clan_id = %s", (clan_id,))
     query_result = cursor.fetchone()
     strike_info["strike_threshold"] = query_result["strike_threshold"]
 
-    cursor.execute("SELECT completed_saturday, day_3, day_4, day_5, day_6, day_7 FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("SELECT completed_saturday, day_3, day_4, day_5, day_6, day_7 FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     strike_info["completed_saturday"] = query_result["completed_saturday"]
     reset_times: List[datetime.datetime] = [query_result[day_key] for day_key in ["day_3", "day_4", "day_5", "day_6", "day_7"]]
@@ -1946,19 +2111,42 @@ def get_clan_strike_determination_data(tag: str) -> Union[ClanStrikeInfo, None]:
     return strike_info
 
 
-def get_river_race_user_data(river_race_id: int) -> List[RiverRaceUserData]:
+def get_river_race_user_data(river_race_id: int,
+                             reset_times: Optional[List[datetime.datetime]]=None) -> List[RiverRaceUserData]:
     """Get a list of all river_race_user_data entries for the specified River Race.
 
     Args:
         river_race_id: ID of race to get entries for.
+        reset_times: Daily reset times starting from the reset before day 4. If provided, also determine whether each user was in
+                     the clan at some point during each of days 4-7 that has ended.
 
     Returns:
-        Unmodified river_race_user_data entries from database.
-    """
-    database, cursor = get_database_connection()
-    cursor.execute("SELECT * FROM river_race_user_data WHERE river_race_id = %s", (river_race_id))
-    database.close()
-    return [river_race_user_data_row for river_race_user_data_row in cursor.fetchall()]
+        Unmodified river_race_user_data entries from database, along with the name and tag of the user each entry belongs to. If
+        reset_times is provided, entries also contain a day_N_in_clan value for each of the days checked.
+    """
+    in_clan_columns = ""
+    args = []
+
+    # A user was in the clan on a given day if they joined before the day started and had not yet left, or joined during the day
+    for day_index in range(1, len(reset_times or [])):
+        in_clan_columns += (", EXISTS(SELECT 1 FROM clan_time WHERE\
+                                clan_time.clan_affiliation_id = river_race_user_data.clan_affiliation_id AND\
+                                ((clan_time.start < %s AND (clan_time.end IS NULL OR %s < clan_time.end)) OR\
+                                 (%s < clan_time.start AND clan_time.start < %s))"
+                            f") AS day_{day_index + 3}_in_clan")
+        day_start = reset_times[day_index - 1]
+        args.extend((day_start, day_start, day_start, reset_times[day_index]))
+
+    args.append(river_race_id)
+
+    with db_session(read_only=True) as cursor:
+        cursor.execute(f"SELECT river_race_user_data.*, users.name AS name, users.tag AS tag{in_clan_columns}\
+                         FROM river_race_user_data\
+                         LEFT JOIN clan_affiliations ON clan_affiliations.id = river_race_user_data.clan_affiliation_id\
+                         LEFT JOIN users ON users.id = clan_affiliations.user_id\
+                         WHERE river_race_user_data.river_race_id = %s",
+                       args)
+        return cursor.fetchall()
 
 
 def update_strikes(search_key: Union[int, str], delta: int) -> Tuple[Union[int, None], Union[int, None]]:
@@ -1974,9 +2162,9 @@ def update_strikes(search_key: Union[int, str], delta: int) -> Tuple[Union[int,
     database, cursor = get_database_connection()
 
     if isinstance(search_key, int):
-        cursor.execute("SELECT id, strikes FROM users WHERE discord_id = %s", (search_key))
+        cursor.execute("SELECT id, strikes FROM users WHERE discord_id = %s", (search_key,))
     elif isinstance(search_key, str):
-        cursor.execute("SELECT id, strikes FROM users WHERE tag = %s", (search_key))
+        cursor.execute("SELECT id, strikes FROM users WHERE tag = %s", (search_key,))
     else:
         LOG.warning(log_message("Tried updating strikes with invalid search key", search_key=search_key, delta=delta))
         database.close()
@@ -2012,7 +2200,7 @@ def get_strike_count(id: int) -> int:
         Number of strikes that specified user has.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT strikes FROM users WHERE discord_id = %s", (id))
+    cursor.execute("SELECT strikes FROM users WHERE discord_id = %s", (id,))
     query_result = cursor.fetchone()
     database.close()
 
@@ -2093,7 +2281,7 @@ def fix_anomalies(tag: str):
     database, cursor = get_database_connection()
     day_keys = ["day_4", "day_5", "day_6", "day_7"]
 
-    cursor.execute("SELECT day_4, day_5, day_6, day_7 FROM river_races WHERE id = %s", (river_race_id))
+    cursor.execute("SELECT day_4, day_5, day_6, day_7 FROM river_races WHERE id = %s", (river_race_id,))
     query_result = cursor.fetchone()
     reset_times: List[datetime.datetime] = [query_result[day_key] for day_key in day_keys]
     reset_times = correct_reset_times(reset_times)
@@ -2217,7 +2405,7 @@ def kick_user(player_tag: str, clan_tag: str) -> bool:
         Whether the kick was successfully logged.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag))
+    cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag,))
     query_result = cursor.fetchone()
 
     if query_result is None:
@@ -2225,7 +2413,7 @@ def kick_user(player_tag: str, clan_tag: str) -> bool:
         return False
 
     user_id = query_result["id"]
-    cursor.execute("SELECT id FROM clans WHERE tag = %s", (clan_tag))
+    cursor.execute("SELECT id FROM clans WHERE tag = %s", (clan_tag,))
     query_result = cursor.fetchone()
 
     if query_result is None:
@@ -2250,7 +2438,7 @@ def undo_kick(player_tag: str, clan_tag: str) -> Union[datetime.datetime, None]:
         Time of most recent kick that was removed, or None if no kicks were removed.
     """
     database, cursor = get_database_connection()
-    cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag))
+    cursor.execute("SELECT id FROM users WHERE tag = %s", (player_tag,))
     query_result = cursor.fetchone()
 
     if query_result is None:
@@ -2258,7 +2446,7 @@ def undo_kick(player_tag: str, clan_tag: str) -> Union[datetime.datetime, None]:
         return None
 
     user_id = query_result["id"]
-    cursor.execute("SELECT id FROM clans WHERE tag = %s", (clan_tag))
+    cursor.execute("SELECT id FROM clans WHERE tag = %s", (clan_tag,))
     query_result = cursor.fetchone()
 
     if query_result is None:
@@ -2303,7 +2491,7 @@ def get_kicks(tag: str) -> Dict[str, KickData]:
     database, cursor = get_database_connection()
     cursor.execute("SELECT time, tag FROM kicks INNER JOIN clans ON kicks.clan_id = clans.id WHERE kicks.user_id =\
                     (SELECT id FROM users WHERE tag = %s)",
-                   (tag))
+                   (tag,))
     database.close()
 
     for kick in cursor:
@@ -2405,13 +2593,13 @@ def export_clan_data(tag: str, name: str, active_only: bool, weeks: int) -> str:
     clean_up_database()
     add_unregistered_users(tag)
     database, cursor = get_database_connection()
-    cursor.execute("SELECT id FROM clans WHERE tag = %s", (tag))
+    cursor.execute("SELECT id FROM clans WHERE tag = %s", (tag,))
     clan_id = cursor.fetchone()["id"]
 
     if active_only:
-        cursor.execute("SELECT id FROM clan_affiliations WHERE clan_id = %s AND role IS NOT NULL", (clan_id))
+        cursor.execute("SELECT id FROM clan_affiliations WHERE clan_id = %s AND role IS NOT NULL", (clan_id,))
     else:
-        cursor.execute("SELECT id FROM clan_affiliations WHERE clan_id = %s", (clan_id))
+        cursor.execute("SELECT id FROM clan_affiliations WHERE clan_id = %s", (clan_id,))
 
     affiliation_id_list: List[int] = [user["id"] for user in cursor]
     path = get_file_path(name)
@@ -2434,7 +2622,7 @@ def export_clan_data(tag: str, name: str, active_only: bool, weeks: int) -> str:
 
     # Data needed to create summary, stats, and deck usage sheets
     cursor.execute("SELECT id, season_id, week, start_time FROM river_races WHERE clan_id = %s ORDER BY season_id DESC, week DESC",
-                   (clan_id))
+                   (clan_id,))
     query_result = [race for race in cursor.fetchmany(size=weeks)]
     query_result.reverse()
 
@@ -2503,7 +2691,7 @@ def export_clan_data(tag: str, name: str, active_only: bool, weeks: int) -> str:
                         FROM users INNER JOIN clan_affiliations ON users.id = clan_affiliations.user_id\
                         INNER JOIN clans ON clan_affiliations.clan_id = clans.id\
                         WHERE clan_affiliations.id = %s",
-                       (clan_affiliation_id))
+                       (clan_affiliation_id,))
         user_data = cursor.fetchone()
 
         if user_data["role"]:
@@ -2594,7 +2782,7 @@ def export_clan_data(tag: str, name: str, active_only: bool, weeks: int) -> str:
         summary_sheet.write_row(row, 0, summary_row)
 
         # All time stats
-        cursor.execute("SELECT * FROM river_race_user_data WHERE clan_affiliation_id = %s", (clan_affiliation_id))
+        cursor.execute("SELECT * FROM river_race_user_data WHERE clan_affiliation_id = %s", (clan_affiliation_id,))
         all_time_stats = [0] * 18
 
         for race_data in cursor:
@@ -2718,13 +2906,13 @@ def export_all_clan_data(primary_only: bool, active_only: bool) -> str:
 
     # Write user data
     for row, user_id in enumerate(user_id_list, start=1):
-        cursor.execute("SELECT name AS player_name, tag AS player_tag, discord_name, strikes FROM users WHERE id = %s", (user_id))
+        cursor.execute("SELECT name AS player_name, tag AS player_tag, discord_name, strikes FROM users WHERE id = %s", (user_id,))
         user_data = cursor.fetchone()
 
         cursor.execute("SELECT name AS clan_name, tag AS clan_tag, role, first_joined FROM clan_affiliations\
                         INNER JOIN clans ON clan_affiliations.clan_id = clans.id\
                         WHERE clan_affiliations.user_id = %s AND role IS NOT NULL",
-                       (user_id))
+                       (user_id,))
         query_result = cursor.fetchone()
 
         if query_result is None:
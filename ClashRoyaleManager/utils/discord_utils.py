@@ -1,9 +1,14 @@
 """Various utility functions for Discord related needs."""
 
+import asyncio
 import cv2
+import functools
+import itertools
 import numpy as np
 import os
-from typing import List, Optional, Set, Tuple, Union
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, FrozenSet, List, Optional, Set, Tuple, Union
 
 import discord
 from prettytable import PrettyTable
@@ -25,6 +30,31 @@ from utils.role_manager import ROLE
 
 CARD_IMAGES_PATH = "card_images"
 DECK_IMAGES_PATH = "deck_images"
+MAX_DECK_IMAGE_WORKERS = 8
+MAX_CONCURRENT_MEMBER_UPDATES = 16
+MENTION_REGEX = re.compile(r"<@!?(\d+)>")
+CARD_LEVEL_BARS = tuple(("■" * length).ljust(20) for length in range(21))
+"""Padded card level chart bars indexed by percentage // 5."""
+SMALL_CARD_LEVEL_BAR = "▪".ljust(20)
+"""Padded card level chart bar for percentages between 0% and 5%."""
+REMINDER_HEADERS = (
+    "",
+    "\n__**1 deck remaining**__\n",
+    "\n__**2 decks remaining**__\n",
+    "\n__**3 decks remaining**__\n",
+    "\n__**4 decks remaining**__\n"
+)
+"""Reminder section headers indexed by number of decks remaining."""
+EMOJI_CACHE: Dict[Tuple[int, str], Optional[discord.Emoji]] = {}
+"""Cached guild emoji lookups keyed by guild ID and emoji name."""
+PLACEMENT_COLORS = (
+    discord.Color.green(),
+    discord.Color.yellow(),
+    discord.Color.orange(),
+    discord.Color.red(),
+    discord.Color.dark_red()
+)
+"""Prediction embed colors indexed by placement. Anything below the last placement uses the last color."""
 
 def full_discord_name(member: discord.Member) -> str:
     """Get a Discord user's username. If they've migrated to a unique username, return that. Otherwise return their name and
@@ -36,17 +66,51 @@ def full_discord_name(member: discord.Member) -> str:
     Returns:
         Specified member's full name.
     """
-    if member.discriminator == "0":
-        return member.name
+    name, discriminator = member.name, member.discriminator
+
+    if discriminator == "0":
+        return name
     else:
-        return member.name + '#' + member.discriminator
+        return f"{name}#{discriminator}"
 
 
-async def assign_roles(member: discord.Member):
-    """Assign proper roles to user based on their clan affiliation and clan role. Should not be used for a member with the New role.
+async def retry_on_rate_limit(request: Callable[[], Awaitable[Any]], attempts: int=4, base_delay: float=1.0) -> Any:
+    """Perform a Discord request, retrying with exponential backoff if it gets rate limited. discord.py already waits for the
+       specified retry_after and retries rate limited requests itself, so this is only a backstop for requests that are still rate
+       limited once those retries are exhausted.
 
     Args:
-        member: Member to fix roles of.
+        request: Function that starts the request and returns an awaitable of its result.
+        attempts: Maximum number of times to try the request.
+        base_delay: Seconds to wait before the first retry. Doubles after each rate limited attempt.
+
+    Returns:
+        Result of the request.
+
+    Raises:
+        discord.HTTPException: Request failed for a reason other than rate limiting, or was still rate limited after all attempts.
+    """
+    for attempt in range(attempts):
+        try:
+            return await request()
+        except discord.HTTPException as error:
+            if error.status != 429 or attempt == attempts - 1:
+                raise
+
+            delay = base_delay * 2**attempt
+            LOG.warning(log_message("Rate limited, retrying request", attempt=attempt + 1, delay=delay))
+            await asyncio.sleep(delay)
+
+
+def get_updated_roles(member: discord.Member) -> Optional[List[discord.Role]]:
+    """Determine the roles a user should have based on their clan affiliation and clan role. Should not be used for a member with
+       the New role.
+
+    Args:
+        member: Member to check roles of.
+
+    Returns:
+        Full list of roles the member should have, or None if their roles are already correct.
     """
     clan_affiliation = db_utils.get_clan_affiliation(member)
 
@@ -63,15 +127,28 @@ async def assign_roles(member: discord.Member):
         else:
             correct_roles = {ROLE[SpecialRole.Visitor]}
 
-    current_roles = set(member.roles).intersection(ROLE.get_all_roles())
+    current_roles = {role for role in member.roles if role.id in ROLE.managed_role_ids}
+
+    if current_roles == correct_roles:
+        return None
 
-    if current_roles != correct_roles:
-        LOG.debug(log_message("Updating roles",
-                              member=member,
-                              current_roles=[role.name for role in current_roles],
-                              correct_roles=[role.name for role in correct_roles]))
-        await member.remove_roles(*list(current_roles - correct_roles))
-        await member.add_roles(*list(correct_roles))
+    LOG.debug(log_message("Updating roles",
+                          member=member,
+                          current_roles=[role.name for role in current_roles],
+                          correct_roles=[role.name for role in correct_roles]))
+    return ROLE.get_unmanaged_roles(member) + list(correct_roles)
+
+
+async def assign_roles(member: discord.Member):
+    """Assign proper roles to user based on their clan affiliation and clan role. Should not be used for a member with the New role.
+
+    Args:
+        member: Member to fix roles of.
+    """
+    roles = get_updated_roles(member)
+
+    if roles is not None:
+        await retry_on_rate_limit(lambda: member.edit(roles=roles, reason="Role sync"))
 
 
 async def reset_to_new(member: discord.Member):
@@ -81,8 +158,8 @@ async def reset_to_new(member: discord.Member):
         member: Member to reset.
     """
     LOG.info(log_message("Removing roles and assigning new role", member=member))
-    await member.remove_roles(*list(ROLE.get_all_roles()))
-    await member.add_roles(ROLE[SpecialRole.New])
+    roles = ROLE.get_unmanaged_roles(member) + [ROLE[SpecialRole.New]]
+    await retry_on_rate_limit(lambda: member.edit(roles=roles, reason="Reset to new"))
 
 
 async def update_member(member: discord.Member, perform_database_update: bool) -> bool:
@@ -112,14 +189,27 @@ async def update_member(member: discord.Member, perform_database_update: bool) -
     if name is None:
         return False
 
-    if name != member.display_name:
-        try:
-            LOG.debug("Updating display name")
-            await member.edit(nick=name)
-        except discord.errors.Forbidden:
-            LOG.debug("Unable to edit display name")
+    roles = get_updated_roles(member)
+
+    if name == member.display_name:
+        if roles is not None:
+            await retry_on_rate_limit(lambda: member.edit(roles=roles, reason="Role sync"))
+
+        return True
+
+    try:
+        LOG.debug("Updating display name")
+
+        if roles is None:
+            await retry_on_rate_limit(lambda: member.edit(nick=name))
+        else:
+            await retry_on_rate_limit(lambda: member.edit(nick=name, roles=roles, reason="Role sync"))
+    except discord.errors.Forbidden:
+        LOG.debug("Unable to edit display name")
+
+        if roles is not None:
+            await retry_on_rate_limit(lambda: member.edit(roles=roles, reason="Role sync"))
 
-    await assign_roles(member)
     return True
 
 
@@ -130,22 +220,45 @@ async def update_all_members(guild: discord.Guild):
         guild: Update members in this guild.
     """
     LOG.info("Starting update on all Discord members")
-    discord_users = db_utils.get_all_discord_users()
 
-    for member in guild.members:
-        if member.bot or member.id not in discord_users:
-            continue
+    if not guild.chunked:
+        await guild.chunk(cache=True)
 
-        if full_discord_name(member) != discord_users[member.id]:
-            LOG.info("Updating member due to updated Discord username")
+    discord_users = db_utils.get_all_discord_users()
+    semaphore = asyncio.Semaphore(MAX_CONCURRENT_MEMBER_UPDATES)
 
+    async def bounded_update_member(member: discord.Member, perform_database_update: bool):
+        async with semaphore:
             try:
-                await update_member(member, True)
+                await update_member(member, perform_database_update)
             except GeneralAPIError:
-                continue
+                LOG.warning(log_message("Failed to update member", member=member))
+
+    async def update_members(members: List[discord.Member], perform_database_update: bool):
+        results = await asyncio.gather(*[bounded_update_member(member, perform_database_update) for member in members],
+                                       return_exceptions=True)
+
+        for member, result in zip(members, results):
+            if isinstance(result, Exception):
+                LOG.error(log_message("Unexpected error while updating member", member=member, error=repr(result)))
+
+    registered_members = {member.id: member for member in guild.members if not member.bot and member.id in discord_users}
+    current_names = {(discord_id, full_discord_name(member)) for discord_id, member in registered_members.items()}
+    renamed_members = []
+
+    for discord_id, discord_name in current_names - discord_users.items():
+        member = registered_members[discord_id]
+        LOG.info(log_message("Updating member due to updated Discord username",
+                             member=member,
+                             old_name=discord_users[discord_id],
+                             new_name=discord_name))
+        renamed_members.append(member)
+
+    await update_members(renamed_members, True)
 
     db_utils.clean_up_database()
     members_to_update = db_utils.get_all_updated_discord_users()
+    flagged_members = []
 
     for discord_id in members_to_update:
         member = guild.get_member(discord_id)
@@ -154,7 +267,9 @@ async def update_all_members(guild: discord.Guild):
             continue
 
         LOG.info(log_message("Updating member due to database clean up flag", member=member, discord_id=discord_id))
-        await update_member(member, False)
+        flagged_members.append(member)
+
+    await update_members(flagged_members, False)
 
 
 async def send_reminder(tag: str, channel: discord.TextChannel, reminder_time: ReminderTime, automated: bool):
@@ -170,43 +285,35 @@ async def send_reminder(tag: str, channel: discord.TextChannel, reminder_time: R
     """
     decks_report = clash_utils.get_decks_report(tag)
     preferred_reminder_times = db_utils.get_user_reminder_times(reminder_time)
-    clan_name = db_utils.get_clan_name(tag)
-    users_to_remind = ""
-    headers = [
-        "",
-        "__**1 deck remaining**__",
-        "__**2 decks remaining**__",
-        "__**3 decks remaining**__",
-        "__**4 decks remaining**__"
-    ]
-    current_header = headers[0]
+    clan_name = discord.utils.escape_markdown(db_utils.get_clan_name(tag))
+    users_to_remind: List[str] = []
 
-    for player_tag, player_name, decks_remaining in decks_report["active_members_with_remaining_decks"]:
-        if player_tag not in preferred_reminder_times:
-            continue
+    # Decks report is already sorted by decks remaining, so each header is emitted at most once.
+    for decks_remaining, group in itertools.groupby(decks_report["active_members_with_remaining_decks"], key=lambda x: x[2]):
+        header_added = False
 
-        if current_header != headers[decks_remaining]:
-            current_header = headers[decks_remaining]
-            users_to_remind += "\n" + current_header + "\n"
+        for player_tag, player_name, _ in group:
+            discord_id = preferred_reminder_times.get(player_tag, discord.utils.MISSING)
 
-        discord_id = preferred_reminder_times[player_tag]
+            if discord_id is discord.utils.MISSING:
+                continue
 
-        if discord_id is not None:
-            member = discord.utils.get(channel.members, id=preferred_reminder_times[player_tag])
-        else:
-            member = None
+            if not header_added:
+                header_added = True
+                users_to_remind.append(REMINDER_HEADERS[decks_remaining])
 
-        if member is None:
-            users_to_remind += f"{discord.utils.escape_markdown(player_name)}\n"
-        else:
-            users_to_remind += f"{member.mention}\n"
+            member = channel.guild.get_member(discord_id) if discord_id is not None else None
+
+            if member is None or not channel.permissions_for(member).read_messages:
+                users_to_remind.append(f"{discord.utils.escape_markdown(player_name)}\n")
+            else:
+                users_to_remind.append(f"{member.mention}\n")
 
     embed = None
 
     if users_to_remind:
-        users_to_remind += "\n"
-        message = f"**The following members of {discord.utils.escape_markdown(clan_name)} still have decks left to use today:**\n"
-        message += users_to_remind
+        message = (f"**The following members of {clan_name} still have decks left to use today:**\n"
+                   + "".join(users_to_remind) + "\n")
 
         if automated:
             embed = discord.Embed(title="This is an automated reminder",
@@ -215,7 +322,7 @@ async def send_reminder(tag: str, channel: discord.TextChannel, reminder_time: R
                                                "use the `/set_reminder_time` command to update your preferences."))
     else:
         if reminder_time == ReminderTime.ALL:
-            message = f"All members of {discord.utils.escape_markdown(clan_name)} have already used all their decks today."
+            message = f"All members of {clan_name} have already used all their decks today."
         else:
             return
 
@@ -285,23 +392,12 @@ def get_member_from_mention(interaction: discord.Interaction, mention: str) -> U
     Returns:
         Member if a member exists, otherwise None.
     """
-    member = None
+    matched_mention = MENTION_REGEX.fullmatch(mention)
 
-    if mention.endswith(">"):
-        if mention.startswith("<@!"):
-            try:
-                id = int(mention[3:-1])
-                member = discord.utils.get(interaction.guild.members, id=id)
-            except ValueError:
-                pass
-        elif mention.startswith("<@"):
-            try:
-                id = int(mention[2:-1])
-                member = discord.utils.get(interaction.guild.members, id=id)
-            except ValueError:
-                pass
+    if matched_mention is None:
+        return None
 
-    return member
+    return interaction.guild.get_member(int(matched_mention.group(1)))
 
 
 async def update_strikes_helper(search_key: Union[int, str], name: str, delta: int, notify_user: bool) -> discord.Embed:
@@ -329,6 +425,31 @@ async def update_strikes_helper(search_key: Union[int, str], name: str, delta: i
     return embed
 
 
+def card_levels_string(cards: Dict[int, int], found_cards: int) -> str:
+    """Create a bar chart of the cumulative percentage of a user's cards at or above each card level.
+
+    Args:
+        cards: Number of cards the user owns at each card level.
+        found_cards: Total number of cards the user owns.
+
+    Returns:
+        Bar chart of card level percentiles from highest level down to the level where 100% is reached.
+    """
+    levels = range(max(cards), 0, -1)
+    counts = np.fromiter((cards[level] for level in levels), dtype=np.int32, count=len(levels))
+    percentages = np.round(np.cumsum(counts) * (100 / found_cards)).astype(int).tolist()
+    lines = []
+
+    for level, percentage in zip(levels, percentages):
+        bar = SMALL_CARD_LEVEL_BAR if 0 < percentage < 5 else CARD_LEVEL_BARS[percentage // 5]
+        lines.append(f"{level:02d}: {bar}  {percentage:02d}%\n")
+
+        if percentage == 100:
+            break
+
+    return "".join(lines)
+
+
 def get_player_report(tag: str, card_levels: bool) -> discord.Embed:
     """Get an embed with information about a player.
 
@@ -384,26 +505,25 @@ def get_player_report(tag: str, card_levels: bool) -> discord.Embed:
                                "```"),
                         inline=False)
 
-        found_cards = clash_data["found_cards"]
-        card_level_string = ""
-        percentile = 0
-        max_card_level = sorted(clash_data["cards"].keys())[-1]
+        card_level_string = card_levels_string(clash_data["cards"], clash_data["found_cards"])
+        embed.add_field(name="Card Levels", value=f"```{card_level_string}```", inline=False)
 
-        for i in range(max_card_level, 0, -1):
-            percentile += clash_data["cards"][i] / found_cards
-            percentage = round(percentile * 100)
+    return embed
 
-            if 0 < percentage < 5:
-                card_level_string += f"{i:02d}: {'▪':<20}  {percentage:02d}%\n"
-            else:
-                card_level_string += f"{i:02d}: {(percentage // 5) * '■':<20}  {percentage:02d}%\n"
 
-            if percentage == 100:
-                break
+def win_loss_block(wins: int, losses: int) -> str:
+    """Format a wins/losses record along with its total and win rate.
 
-        embed.add_field(name="Card Levels", value=f"```{card_level_string}```", inline=False)
+    Args:
+        wins: Number of wins.
+        losses: Number of losses.
 
-    return embed
+    Returns:
+        Multiline string of wins, losses, total, and win rate.
+    """
+    total = wins + losses
+    win_rate = "0.00%" if total == 0 else f"{wins / total:.2%}"
+    return f"Wins   {wins}\nLosses {losses}\nTotal:  {total}\nWin Rate: {win_rate}"
 
 
 def get_stats_report(player_tag: str,
@@ -425,68 +545,21 @@ def get_stats_report(player_tag: str,
     clan_name = discord.utils.escape_markdown(clan_name) if clan_name is not None else "all clans"
     title = f"{discord.utils.escape_markdown(player_name)}'s stats in {clan_name}"
     embed = discord.Embed(title=title, color=discord.Color.random())
-    combined_wins = 0
-    combined_losses = 0
-
-    # Regular matches
-    wins = stats["regular_wins"]
-    losses = stats["regular_losses"]
-    combined_wins += wins
-    combined_losses += losses
-    total = wins + losses
-    win_rate = "0.00%" if total == 0 else f"{wins / total:.2%}"
-    embed.add_field(name="Regular PvP",
-                    value=f"```Wins   {wins}\nLosses {losses}\nTotal:  {total}\nWin Rate: {win_rate}```")
-
-    # Special matches
-    wins = stats["special_wins"]
-    losses = stats["special_losses"]
-    combined_wins += wins
-    combined_losses += losses
-    total = wins + losses
-    win_rate = "0.00%" if total == 0 else f"{wins / total:.2%}"
-    embed.add_field(name="Special PvP",
-                    value=f"```Wins   {wins}\nLosses {losses}\nTotal:  {total}\nWin Rate: {win_rate}```")
-
-    # Divider
-    embed.add_field(name="\u200b", value="\u200b", inline=False)
-
-    # Duel matches
-    wins = stats["duel_wins"]
-    losses = stats["duel_losses"]
-    combined_wins += wins
-    combined_losses += losses
-    total = wins + losses
-    win_rate = "0.00%" if total == 0 else f"{wins / total:.2%}"
-    embed.add_field(name="Duel (matches)",
-                    value=f"```Wins   {wins}\nLosses {losses}\nTotal:  {total}\nWin Rate: {win_rate}```")
-
-    # Duel series
-    wins = stats["series_wins"]
-    losses = stats["series_losses"]
-    total = wins + losses
-    win_rate = "0.00%" if total == 0 else f"{wins / total:.2%}"
-    embed.add_field(name="Duel (series)",
-                    value=f"```Wins   {wins}\nLosses {losses}\nTotal:  {total}\nWin Rate: {win_rate}```")
-
-    # Divider
-    embed.add_field(name="\u200b", value="\u200b", inline=False)
-
-    # Combined matches
-    total = combined_wins + combined_losses
-    win_rate = "0.00%" if total == 0 else f"{combined_wins / total:.2%}"
-    embed.add_field(name="Combined PvP",
-                    value=f"```Wins   {combined_wins}\nLosses {combined_losses}\nTotal:  {total}\nWin Rate: {win_rate}```",
-                    inline=False)
+    combined_wins = stats["regular_wins"] + stats["special_wins"] + stats["duel_wins"]
+    combined_losses = stats["regular_losses"] + stats["special_losses"] + stats["duel_losses"]
+    pvp_sections = [
+        ("Regular PvP", stats["regular_wins"], stats["regular_losses"]),
+        ("Special PvP", stats["special_wins"], stats["special_losses"]),
+        ("Duel (matches)", stats["duel_wins"], stats["duel_losses"]),
+        ("Duel (series)", stats["series_wins"], stats["series_losses"]),
+        ("Combined PvP", combined_wins, combined_losses)
+    ]
+    pvp_stats = "\n\n".join(f"{section}\n{win_loss_block(wins, losses)}" for section, wins, losses in pvp_sections)
 
-    # Boat attacks
-    wins = stats["boat_wins"]
-    losses = stats["boat_losses"]
-    total = wins + losses
-    win_rate = "0.00%" if total == 0 else f"{wins / total:.2%}"
+    embed.add_field(name="PvP", value=f"```{pvp_stats}```", inline=False)
     embed.add_field(name="Boat Attacks",
-                    value=f"```Wins   {wins}\nLosses {losses}\nTotal:  {total}\nWin Rate: {win_rate}```")
-
+                    value=f"```{win_loss_block(stats['boat_wins'], stats['boat_losses'])}```",
+                    inline=False)
     return embed
 
 
@@ -514,22 +587,15 @@ def create_prediction_embed(tag: str, predicted_outcomes: List[PredictedOutcome]
 
         primary_placement += 1
 
-    if primary_placement == 1 or primary_predicted_outcome["completed"]:
-        color = discord.Color.green()
-    elif primary_placement == 2:
-        color = discord.Color.yellow()
-    elif primary_placement == 3:
-        color = discord.Color.orange()
-    elif primary_placement == 4:
-        color = discord.Color.red()
+    if primary_predicted_outcome["completed"]:
+        color = PLACEMENT_COLORS[0]
     else:
-        color = discord.Color.dark_red()
+        color = PLACEMENT_COLORS[min(primary_placement, len(PLACEMENT_COLORS)) - 1]
 
-    description = ""
+    description: List[str] = []
 
     if completed_clan is not None:
-        description += f"{completed_clan} has already crossed the finish line and won the River Race."
-        description += "\n\n"
+        description.append(f"{completed_clan} has already crossed the finish line and won the River Race.\n\n")
 
     expected_catchup = primary_predicted_outcome["expected_decks_catchup_win_rate"]
     all_remaining_catchup = primary_predicted_outcome["remaining_decks_catchup_win_rate"]
@@ -538,12 +604,12 @@ def create_prediction_embed(tag: str, predicted_outcomes: List[PredictedOutcome]
     if expected_catchup is not None and all_remaining_catchup is not None:
         if expected_catchup == all_remaining_catchup:
             if expected_catchup == -1:
-                description += (f"{primary_name} can surpass the predicted score of first place by using all "
-                                f"{primary_predicted_outcome['remaining_decks']} remaining decks at any win rate.")
+                description.append(f"{primary_name} can surpass the predicted score of first place by using all "
+                                   f"{primary_predicted_outcome['remaining_decks']} remaining decks at any win rate.")
             else:
-                description += (f"{primary_name} can reach the predicted score of first place by using all "
-                                f"{primary_predicted_outcome['remaining_decks']} remaining decks at a "
-                                f"{round(all_remaining_catchup * 100, 2)}% win rate.")
+                description.append(f"{primary_name} can reach the predicted score of first place by using all "
+                                   f"{primary_predicted_outcome['remaining_decks']} remaining decks at a "
+                                   f"{round(all_remaining_catchup * 100, 2)}% win rate.")
         else:
             if expected_catchup == 1:
                 expected_str = "any win rate"
@@ -555,21 +621,21 @@ def create_prediction_embed(tag: str, predicted_outcomes: List[PredictedOutcome]
             else:
                 all_remaining_str = f"a {round(all_remaining_catchup * 100, 2)}% win rate"
 
-            description += (f"{primary_name} can reach the predicted score of first place by using "
-                            f"{primary_predicted_outcome['expected_decks_to_use']} decks at {expected_str} or all "
-                            f"{primary_predicted_outcome['remaining_decks']} remaining decks at {all_remaining_str}.")
+            description.append(f"{primary_name} can reach the predicted score of first place by using "
+                               f"{primary_predicted_outcome['expected_decks_to_use']} decks at {expected_str} or all "
+                               f"{primary_predicted_outcome['remaining_decks']} remaining decks at {all_remaining_str}.")
     elif all_remaining_catchup is not None:
         if all_remaining_catchup == -1:
-            description += (f"{primary_name} can surpass the predicted score of first place by using all "
-                            f"{primary_predicted_outcome['remaining_decks']} remaining decks at any win rate.")
+            description.append(f"{primary_name} can surpass the predicted score of first place by using all "
+                               f"{primary_predicted_outcome['remaining_decks']} remaining decks at any win rate.")
         else:
-            description += (f"{primary_name} can reach the predicted score of first place by using all "
-                            f"{primary_predicted_outcome['remaining_decks']} decks at a "
-                            f"{round(all_remaining_catchup * 100, 2)}% win rate.")
+            description.append(f"{primary_name} can reach the predicted score of first place by using all "
+                               f"{primary_predicted_outcome['remaining_decks']} decks at a "
+                               f"{round(all_remaining_catchup * 100, 2)}% win rate.")
     elif primary_placement != 1:
-        description += f"{primary_name} cannot reach the predicted score of first place today."
+        description.append(f"{primary_name} cannot reach the predicted score of first place today.")
 
-    embed = discord.Embed(title="Predicted Outcome for Today", description=description, color=color)
+    embed = discord.Embed(title="Predicted Outcome for Today", description="".join(description), color=color)
 
     for place, predicted_outcome in enumerate(predicted_outcomes, start=1):
         embed.add_field(name=f"{place}. {discord.utils.escape_markdown(predicted_outcome['name'])}",
@@ -605,23 +671,7 @@ def create_card_levels_embed(clash_data: ClashData) -> discord.Embed:
                             "```"),
                     inline=False)
 
-    found_cards = clash_data["found_cards"]
-    card_level_string = ""
-    percentile = 0
-    max_card_level = sorted(clash_data["cards"].keys())[-1]
-
-    for i in range(max_card_level, 0, -1):
-        percentile += clash_data["cards"][i] / found_cards
-        percentage = round(percentile * 100)
-
-        if 0 < percentage < 5:
-            card_level_string += f"{i:02d}: {'▪':<20}  {percentage:02d}%\n"
-        else:
-            card_level_string += f"{i:02d}: {(percentage // 5) * '■':<20}  {percentage:02d}%\n"
-
-        if percentage == 100:
-            break
-
+    card_level_string = card_levels_string(clash_data["cards"], clash_data["found_cards"])
     embed.add_field(name="Card Levels", value=f"```{card_level_string}```", inline=False)
     return embed
 
@@ -637,8 +687,6 @@ def create_deck_image(deck: Set[int], output_name: str) -> str:
         Path to merged image.
     """
     images = []
-    max_height = 0
-    max_width = 0
     deck = list(deck)
 
     deck.sort(key=lambda card_id: (CARD_INFO[card_id]["type"].value,
@@ -649,39 +697,21 @@ def create_deck_image(deck: Set[int], output_name: str) -> str:
     for card_id in deck:
         card_image_path = os.path.join(CARD_IMAGES_PATH, f"{card_id}.png")
         image = cv2.imread(card_image_path, cv2.IMREAD_UNCHANGED)
-        y,x = image[:,:,3].nonzero()
-        min_x = np.min(x)
-        min_y = np.min(y)
-        max_x = np.max(x)
-        max_y = np.max(y)
-
-        cropped_image = image[min_y:max_y, min_x:max_x]
-        images.append(cropped_image)
-
-        if images[-1].shape[0] > max_height:
-            max_height = images[-1].shape[0]
-
-        if images[-1].shape[1] > max_width:
-            max_width = images[-1].shape[1]
-
-    for i in range(len(images)):
-        image = images[i]
-
-        if image.shape[0] < max_height:
-            diff = max_height - image.shape[0]
-            top_height = diff // 2
-            bottom_height = diff // 2
+        x, y, width, height = cv2.boundingRect(image[:,:,3])
+        images.append(image[y:y+height, x:x+width])
 
-            if diff % 2 != 0:
-                bottom_height += 1
+    max_height = max(image.shape[0] for image in images)
+    total_width = sum(image.shape[1] for image in images)
+    merged_image = np.zeros((max_height, total_width, 4), dtype=np.uint8)
+    x = 0
 
-            top_black = np.zeros((top_height, image.shape[1], 4))
-            bottom_black = np.zeros((bottom_height, image.shape[1], 4))
-            image = np.vstack((top_black, image, bottom_black))
+    # Vertically center each card in the canvas, leaving any extra space transparent.
+    for image in images:
+        height, width = image.shape[:2]
+        y = (max_height - height) // 2
+        merged_image[y:y+height, x:x+width] = image
+        x += width
 
-        images[i] = image
-
-    merged_image = np.concatenate(tuple(images), axis=1)
     output_file_path = os.path.join(DECK_IMAGES_PATH, f"{output_name}.png")
     cv2.imwrite(output_file_path, merged_image)
     return output_file_path
@@ -696,19 +726,21 @@ def create_deck_images(decks: List[Set[int]]) -> List[str]:
     Returns:
         List of paths of deck images corresponding to the order of the decks passed in.
     """
-    card_images = []
+    if not decks:
+        return []
 
     if not os.path.exists(DECK_IMAGES_PATH):
         os.makedirs(DECK_IMAGES_PATH)
 
-    for i, deck in enumerate(decks, start=1):
-        card_images.append(create_deck_image(deck, str(i)))
+    output_names = [str(i) for i in range(1, len(decks) + 1)]
 
-    return card_images
+    with ThreadPoolExecutor(max_workers=min(MAX_DECK_IMAGE_WORKERS, len(decks))) as executor:
+        return list(executor.map(create_deck_image, decks, output_names))
 
 
-def deck_link(deck: Set[int]) -> str:
-    """Create a url that can be used to copy a Clash Royale deck.
+@functools.lru_cache(maxsize=512)
+def deck_link(deck: FrozenSet[int]) -> str:
+    """Create a url that can be used to copy a Clash Royale deck. Links are cached per deck.
 
     Args:
         deck: Set of IDs of cards in deck.
@@ -716,9 +748,35 @@ def deck_link(deck: Set[int]) -> str:
     Returns:
         URL of deck link.
     """
-    url = "https://link.clashroyale.com/deck/en?deck="
-    url += ";".join(str(id) for id in sorted(deck))
-    return url
+    return "https://link.clashroyale.com/deck/en?deck=" + ";".join(map(str, sorted(deck)))
+
+
+def get_emoji(guild: discord.Guild, name: str) -> Optional[discord.Emoji]:
+    """Get a custom emoji from a guild by name. Lookups are cached until the guild's emojis are updated.
+
+    Args:
+        guild: Guild to get emoji from.
+        name: Name of emoji.
+
+    Returns:
+        Emoji with the specified name, or None if the guild does not have one.
+    """
+    key = (guild.id, name)
+
+    if key not in EMOJI_CACHE:
+        EMOJI_CACHE[key] = discord.utils.get(guild.emojis, name=name)
+
+    return EMOJI_CACHE[key]
+
+
+def clear_emoji_cache(guild: discord.Guild):
+    """Remove any cached emoji lookups for a guild.
+
+    Args:
+        guild: Guild to clear cached emojis of.
+    """
+    for key in [key for key in EMOJI_CACHE if key[0] == guild.id]:
+        del EMOJI_CACHE[key]
 
 
 def create_deck_embeds(interaction: discord.Interaction,
@@ -743,8 +801,8 @@ def create_deck_embeds(interaction: discord.Interaction,
     embeds: List[discord.Embed] = []
     files: List[discord.File] = []
 
-    elixir_emoji = discord.utils.get(interaction.guild.emojis, name="avgelixir")
-    cycle_emoji = discord.utils.get(interaction.guild.emojis, name="4cardcycle")
+    elixir_emoji = get_emoji(interaction.guild, "avgelixir")
+    cycle_emoji = get_emoji(interaction.guild, "4cardcycle")
 
     for deck, image_path, color in zip(decks, deck_images, discord_colors):
         url = deck_link(deck.deck)
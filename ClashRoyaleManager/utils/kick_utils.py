@@ -1,13 +1,14 @@
 """Create views for handling kick screenshots."""
 
-import os
+import asyncio
 import re
-from difflib import SequenceMatcher
 from typing import List, Tuple, Union
 
 import cv2
 import discord
+import numpy as np
 import pytesseract
+from rapidfuzz import fuzz, process
 
 import utils.clash_utils as clash_utils
 import utils.db_utils as db_utils
@@ -16,6 +17,10 @@ from utils.custom_types import Participant
 from utils.exceptions import GeneralAPIError
 
 PRIMARY_CLANS = db_utils.get_primary_clans()
+PRIMARY_CLAN_TAGS_AND_NAMES = tuple((clan["tag"], clan["name"]) for clan in PRIMARY_CLANS)
+"""Tag and name of each primary clan, used to build kick buttons."""
+TAG_REGEX = re.compile(r"(#[A-Z0-9]+)")
+NAME_REGEX = re.compile(r"(?i)kick (.*) out of the clan\?")
 
 def parse_image_text(text: str) -> Tuple[Union[str, None], Union[str, None]]:
     """Parse text for a player tag and/or player name.
@@ -26,14 +31,14 @@ def parse_image_text(text: str) -> Tuple[Union[str, None], Union[str, None]]:
     Returns:
         Tuple of player tag if found (otherwise None) and player name if found (otherwise None).
     """
-    tag = re.search(r"(#[A-Z0-9]+)", text)
+    tag = TAG_REGEX.search(text)
 
     if tag is not None:
         tag = tag.group(1)
     else:
         tag = None
 
-    name = re.search(r"(?i)kick (.*) out of the clan\?", text)
+    name = NAME_REGEX.search(text)
 
     if name is not None:
         name = name.group(1)
@@ -43,6 +48,38 @@ def parse_image_text(text: str) -> Tuple[Union[str, None], Union[str, None]]:
     return (tag, name)
 
 
+def get_clan_participants(clan_tag: str) -> List[Participant]:
+    """Get participants of a clan's current River Race on Battle Days, or of its previous River Race otherwise.
+
+    Args:
+        clan_tag: Tag of clan to get participants of.
+
+    Returns:
+        List of participants, or an empty list if they could not be retrieved.
+    """
+    try:
+        if db_utils.is_battle_time(clan_tag):
+            return clash_utils.get_river_race_participants(clan_tag)
+        else:
+            return clash_utils.get_prior_river_race_participants(clan_tag)
+    except GeneralAPIError:
+        LOG.warning("Failed to get participants while parsing kick screenshot")
+        return []
+
+
+def read_image_text(image_bytes: bytes) -> str:
+    """Run OCR on an encoded image.
+
+    Args:
+        image_bytes: Contents of image file.
+
+    Returns:
+        Text found in image.
+    """
+    img = cv2.imdecode(np.frombuffer(image_bytes, np.uint8), cv2.IMREAD_COLOR)
+    return pytesseract.image_to_string(img)
+
+
 async def get_player_info_from_image(image: discord.Attachment) -> Tuple[Union[str, None], Union[str, None]]:
     """Parse a kick screenshot for a player name and/or player tag.
 
@@ -52,60 +89,39 @@ async def get_player_info_from_image(image: discord.Attachment) -> Tuple[Union[s
     Returns:
         Tuple of closest matching player tag and player name from screenshot.
     """
-    participants: List[Participant] = []
-
-    for clan in PRIMARY_CLANS:
-        try:
-            if db_utils.is_battle_time(clan["tag"]):
-                participants += clash_utils.get_river_race_participants(clan["tag"])
-            else:
-                participants += clash_utils.get_prior_river_race_participants(clan["tag"])
-        except GeneralAPIError:
-            LOG.warning("Failed to get participants while parsing kick screenshot")
-            continue
+    clan_participants, image_bytes = await asyncio.gather(
+        asyncio.gather(*[asyncio.to_thread(get_clan_participants, clan_tag) for clan_tag, _ in PRIMARY_CLAN_TAGS_AND_NAMES]),
+        image.read()
+    )
+    participants: List[Participant] = [participant for participants in clan_participants for participant in participants]
 
     if not participants:
         return (None, None)
 
-    file_path = "kick_images"
-
-    if not os.path.exists(file_path):
-        os.makedirs(file_path)
-
-    file_path += '/' + image.filename
-    await image.save(file_path)
-    img = cv2.imread(file_path)
-    text = pytesseract.image_to_string(img)
-    os.remove(file_path)
-
+    text = await asyncio.to_thread(read_image_text, image_bytes)
     tag, name = parse_image_text(text)
+    tags = [participant["tag"] for participant in participants]
+    names = [participant["name"] for participant in participants]
     closest_tag = None
     closest_name = None
-    highest_tag_similarity = 0
-    highest_name_similarity = 0
 
-    for participant in participants:
-        active_tag = participant["tag"]
-        active_name = participant["name"]
+    if tag is not None:
+        match = process.extractOne(tag, tags, scorer=fuzz.ratio)
 
-        if tag is not None:
-            temp_tag_similarity = SequenceMatcher(None, tag, active_tag).ratio()
-            if temp_tag_similarity > highest_tag_similarity:
-                highest_tag_similarity = temp_tag_similarity
-                closest_tag = active_tag
+        if match is not None and match[1] > 0:
+            closest_tag, _, index = match
 
-                if name is None:
-                    closest_name = active_name
+            if name is None:
+                closest_name = names[index]
 
-        if name is not None:
-            temp_name_similarity = SequenceMatcher(None, name, active_name).ratio()
+    if name is not None:
+        match = process.extractOne(name, names, scorer=fuzz.ratio)
 
-            if temp_name_similarity > highest_name_similarity:
-                highest_name_similarity = temp_name_similarity
-                closest_name = active_name
+        if match is not None and match[1] > 0:
+            closest_name, _, index = match
 
-                if tag is None:
-                    closest_tag = active_tag
+            if tag is None:
+                closest_tag = tags[index]
 
     return_info = (closest_tag, closest_name)
 
@@ -175,7 +191,7 @@ class KickView(discord.ui.View):
         """
         super().__init__()
 
-        for clan in PRIMARY_CLANS:
-            self.add_item(KickButton(clan['tag'], clan['name'], player_tag, player_name))
+        for clan_tag, clan_name in PRIMARY_CLAN_TAGS_AND_NAMES:
+            self.add_item(KickButton(clan_tag, clan_name, player_tag, player_name))
 
         self.add_item(KickDeleteButton(player_name))
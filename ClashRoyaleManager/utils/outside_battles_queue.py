@@ -1,8 +1,9 @@
 """List of warnings to send to NewMemberInfo when a user joins a clan on a war day after battling for a different clan."""
 
-from typing import List, Tuple
+from collections import deque
+from typing import Deque, Tuple
 
 from utils.custom_types import ClashData
 
-UNSENT_WARNINGS: List[Tuple[ClashData, int]] = []
-"""List of data to be sent."""
+UNSENT_WARNINGS: Deque[Tuple[ClashData, int]] = deque()
+"""Queue of data to be sent."""
@@ -1,6 +1,6 @@
 """Role manager. Gets saved clan and special roles and makes them accessible through ROLE object."""
 
-from typing import Dict, Set, Union
+from typing import Dict, FrozenSet, List, Optional, Union
 
 import discord
 
@@ -13,6 +13,9 @@ class RoleManager:
     def __init__(self):
         """Creates roles dictionary."""
         self.roles: Dict[Union[ClanRole, SpecialRole], discord.Role] = {}
+        self.all_roles: Optional[FrozenSet[discord.Role]] = None
+        self.all_role_ids: Optional[FrozenSet[int]] = None
+        self.clan_roles: Optional[Dict[str, discord.Role]] = None
 
     def initialize_roles(self, guild: discord.Guild):
         """If the database is fully initialized, get all relevant roles.
@@ -33,6 +36,8 @@ class RoleManager:
                 role = guild.get_role(role_id)
                 self.roles[special_role] = role
 
+        self.invalidate_cache()
+
 
     def __getitem__(self, role: Union[ClanRole, SpecialRole]) -> discord.Role:
         """Get specified Discord role.
@@ -47,7 +52,7 @@ class RoleManager:
 
 
     def get_affiliated_clan_role(self, tag: str) -> discord.Role:
-        """Get role affiliated with the specified clan.
+        """Get role affiliated with the specified clan. Roles of primary clans are cached until invalidate_cache is called.
 
         Args:
             tag: Tag of clan to get affiliated role of.
@@ -55,23 +60,66 @@ class RoleManager:
         Returns:
             Discord role object affiliated with specified clan.
         """
+        clan_roles = self.get_primary_clan_roles()
+
+        if tag in clan_roles:
+            return clan_roles[tag]
+
         role_id = db_utils.get_clan_affiliated_role_id(tag)
         return self.guild.get_role(role_id)
 
 
-    def get_all_roles(self) -> Set[discord.Role]:
-        """Get all clan roles, special roles, and primary clan roles.
+    def get_unmanaged_roles(self, member: discord.Member) -> List[discord.Role]:
+        """Get a member's roles that are not managed by the role manager, excluding the default role.
+
+        Args:
+            member: Member to get roles of.
+
+        Returns:
+            List of roles to preserve when replacing a member's roles.
+        """
+        return [role for role in member.roles if role.id not in self.managed_role_ids and not role.is_default()]
+
+
+    def get_all_roles(self) -> FrozenSet[discord.Role]:
+        """Get all clan roles, special roles, and primary clan roles. The result is cached until invalidate_cache is called.
 
         Returns:
             Set of relevant roles.
         """
-        role_set = {role for role in self.roles.values()}
-        primary_clans = db_utils.get_primary_clans()
+        if self.all_roles is None:
+            self.all_roles = frozenset(self.roles.values()) | frozenset(self.get_primary_clan_roles().values())
+
+        return self.all_roles
+
+
+    def get_primary_clan_roles(self) -> Dict[str, discord.Role]:
+        """Get the roles of all primary clans. The result is cached until invalidate_cache is called.
+
+        Returns:
+            Dictionary mapping primary clan tags to their Discord roles.
+        """
+        if self.clan_roles is None:
+            self.clan_roles = {clan["tag"]: self.guild.get_role(clan["discord_role_id"])
+                               for clan in db_utils.get_primary_clans()}
+
+        return self.clan_roles
+
+
+    @property
+    def managed_role_ids(self) -> FrozenSet[int]:
+        """IDs of all roles returned by get_all_roles."""
+        if self.all_role_ids is None:
+            self.all_role_ids = frozenset(role.id for role in self.get_all_roles() if role is not None)
+
+        return self.all_role_ids
 
-        for clan in primary_clans:
-            role_set.add(self.guild.get_role(clan["discord_role_id"]))
 
-        return role_set
+    def invalidate_cache(self):
+        """Clear the cached relevant roles and primary clan roles. Must be called whenever primary clans are added or removed."""
+        self.all_roles = None
+        self.all_role_ids = None
+        self.clan_roles = None
 
 
 ROLE = RoleManager()
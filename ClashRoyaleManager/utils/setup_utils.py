@@ -1,8 +1,12 @@
 """Utility functions that interface with database for first time setup."""
 
-from typing import List, Union
+import datetime
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
 
 import discord
+import pymysql
 
 import utils.clash_utils as clash_utils
 import utils.db_utils as db_utils
@@ -11,47 +15,102 @@ from utils.custom_types import (
     SpecialChannel,
     SpecialRole
 )
+from utils.role_manager import ROLE
 
-def set_clan_role(clan_role: ClanRole, discord_role: discord.Role):
+SETUP_CHECK_CACHE_DURATION = datetime.timedelta(minutes=1)
+"""How long results of setup checks are cached before querying the database again."""
+SETUP_CHECK_CACHE: Dict[str, Tuple[datetime.datetime, Any]] = {}
+"""Cached setup check results keyed by function name, along with the time each result was cached."""
+
+def cache_setup_check(check: Callable[..., Any]) -> Callable[..., Any]:
+    """Decorator that caches the result of a setup check until it expires or clear_setup_check_cache is called. Results are not
+       keyed by cursor, so a cached result may be returned without querying through the caller's cursor or seeing its uncommitted
+       changes.
+
+    Args:
+        check: Setup check to cache the result of.
+
+    Returns:
+        Wrapped setup check.
+    """
+    @functools.wraps(check)
+    def wrapper(cursor: Optional[pymysql.cursors.DictCursor]=None) -> Any:
+        now = datetime.datetime.utcnow()
+        cached = SETUP_CHECK_CACHE.get(check.__name__)
+
+        if cached is not None and now - cached[0] < SETUP_CHECK_CACHE_DURATION:
+            return cached[1]
+
+        result = check(cursor)
+        SETUP_CHECK_CACHE[check.__name__] = (now, result)
+        return result
+
+    return wrapper
+
+
+def clear_setup_check_cache():
+    """Clear all cached setup check results. Must be called whenever setup data is modified."""
+    SETUP_CHECK_CACHE.clear()
+
+
+def set_clan_role(clan_role: ClanRole, discord_role: discord.Role, cursor: Optional[pymysql.cursors.DictCursor]=None):
     """Associate a clan role with a Discord role.
 
     Args:
         clan_role: Clan role to assign Discord role to.
         discord_role: Discord role to assign to clan role.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+                Caller is responsible for committing changes made by cursor if provided, then calling clear_setup_check_cache.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("INSERT INTO clan_role_discord_roles VALUES (DEFAULT, %s, %s) ON DUPLICATE KEY UPDATE discord_role_id = %s",
-                   (clan_role.value, discord_role.id, discord_role.id))
-    database.commit()
-    database.close()
+    cursor_provided = cursor is not None
+
+    with db_utils.db_session(cursor) as cursor:
+        cursor.execute("INSERT INTO clan_role_discord_roles VALUES (DEFAULT, %s, %s) ON DUPLICATE KEY UPDATE discord_role_id = %s",
+                       (clan_role.value, discord_role.id, discord_role.id))
+
+    if not cursor_provided:
+        clear_setup_check_cache()
 
 
-def set_special_role(special_role: SpecialRole, discord_role: discord.Role):
+def set_special_role(special_role: SpecialRole, discord_role: discord.Role, cursor: Optional[pymysql.cursors.DictCursor]=None):
     """Associate a special role with a Discord role.
 
     Args:
         special_role: Special role to assign Discord role to.
         discord_role: Discord role to assign to special role.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+                Caller is responsible for committing changes made by cursor if provided, then calling clear_setup_check_cache.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("INSERT INTO special_discord_roles VALUES (DEFAULT, %s, %s) ON DUPLICATE KEY UPDATE discord_role_id = %s",
-                   (special_role.value, discord_role.id, discord_role.id))
-    database.commit()
-    database.close()
+    cursor_provided = cursor is not None
 
+    with db_utils.db_session(cursor) as cursor:
+        cursor.execute("INSERT INTO special_discord_roles VALUES (DEFAULT, %s, %s) ON DUPLICATE KEY UPDATE discord_role_id = %s",
+                       (special_role.value, discord_role.id, discord_role.id))
 
-def set_special_channel(special_channel: SpecialChannel, discord_channel: discord.TextChannel):
+    if not cursor_provided:
+        clear_setup_check_cache()
+
+
+def set_special_channel(special_channel: SpecialChannel,
+                        discord_channel: discord.TextChannel,
+                        cursor: Optional[pymysql.cursors.DictCursor]=None):
     """Save channels for automated strikes and reminders.
 
     Args:
         special_channel: Special channel type.
         discord_channel: Channel to send messages to.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+                Caller is responsible for committing changes made by cursor if provided, then calling clear_setup_check_cache.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("INSERT INTO special_discord_channels VALUES (DEFAULT, %s, %s) ON DUPLICATE KEY UPDATE discord_channel_id = %s",
-                   (special_channel.value, discord_channel.id, discord_channel.id))
-    database.commit()
-    database.close()
+    cursor_provided = cursor is not None
+
+    with db_utils.db_session(cursor) as cursor:
+        cursor.execute("INSERT INTO special_discord_channels VALUES (DEFAULT, %s, %s)\
+                        ON DUPLICATE KEY UPDATE discord_channel_id = %s",
+                       (special_channel.value, discord_channel.id, discord_channel.id))
+
+    if not cursor_provided:
+        clear_setup_check_cache()
 
 
 def set_primary_clan(tag: str,
@@ -60,7 +119,8 @@ def set_primary_clan(tag: str,
                      track_stats: bool,
                      send_reminders: bool,
                      assign_strikes: bool,
-                     strike_threshold: int) -> str:
+                     strike_threshold: int,
+                     cursor: Optional[pymysql.cursors.DictCursor]=None) -> str:
     """Designate the specified clan as a primary clan.
 
     Args:
@@ -71,6 +131,9 @@ def set_primary_clan(tag: str,
         send_reminders: Whether to send automated reminders to members of this clan.
         assign_strikes: Whether to assign automated strikes to members of this clan.
         strike_threshold: How many decks are needed per war day.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+                Caller is responsible for committing changes made by cursor if provided, then calling clear_setup_check_cache and
+                ROLE.invalidate_cache.
 
     Returns:
         Name of clan that was designated as a primary clan.
@@ -80,118 +143,144 @@ def set_primary_clan(tag: str,
         ResourceNotFound: Clan does not already exist in clans table and is an invalid clan tag.
     """
     name = clash_utils.get_clan_name(tag)
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("INSERT INTO clans (tag, name, discord_role_id) VALUES (%s, %s, %s)\
-                    ON DUPLICATE KEY UPDATE name = %s, discord_role_id = %s",
-                   (tag, name, role.id, name, role.id))
-    cursor.execute("SELECT id FROM clans WHERE tag = %s", (tag))
-    clan_id = cursor.fetchone()["id"]
-    args_dict = {
-        "clan_id": clan_id,
-        "track_stats": track_stats,
-        "send_reminders": send_reminders,
-        "assign_strikes": assign_strikes,
-        "strike_threshold": strike_threshold,
-        "discord_channel_id": channel.id
-    }
-    cursor.execute("INSERT INTO primary_clans VALUES\
-                    (%(clan_id)s, %(track_stats)s, %(send_reminders)s, %(assign_strikes)s,\
-                     %(strike_threshold)s, %(discord_channel_id)s)\
-                    ON DUPLICATE KEY UPDATE track_stats = %(track_stats)s, send_reminders = %(send_reminders)s,\
-                    assign_strikes = %(assign_strikes)s, strike_threshold = %(strike_threshold)s,\
-                    discord_channel_id = %(discord_channel_id)s",
-                   args_dict)
-    cursor.execute("SELECT name FROM clans WHERE id = %s", (clan_id))
-    name = cursor.fetchone()["name"]
-    database.commit()
-    database.close()
+    cursor_provided = cursor is not None
+
+    with db_utils.db_session(cursor) as cursor:
+        cursor.execute("INSERT INTO clans (tag, name, discord_role_id) VALUES (%s, %s, %s)\
+                        ON DUPLICATE KEY UPDATE name = %s, discord_role_id = %s, id = LAST_INSERT_ID(id)",
+                       (tag, name, role.id, name, role.id))
+        clan_id = cursor.lastrowid
+        args_dict = {
+            "clan_id": clan_id,
+            "track_stats": track_stats,
+            "send_reminders": send_reminders,
+            "assign_strikes": assign_strikes,
+            "strike_threshold": strike_threshold,
+            "discord_channel_id": channel.id
+        }
+        cursor.execute("INSERT INTO primary_clans VALUES\
+                        (%(clan_id)s, %(track_stats)s, %(send_reminders)s, %(assign_strikes)s,\
+                         %(strike_threshold)s, %(discord_channel_id)s)\
+                        ON DUPLICATE KEY UPDATE track_stats = %(track_stats)s, send_reminders = %(send_reminders)s,\
+                        assign_strikes = %(assign_strikes)s, strike_threshold = %(strike_threshold)s,\
+                        discord_channel_id = %(discord_channel_id)s",
+                       args_dict)
+
+    if not cursor_provided:
+        ROLE.invalidate_cache()
+        clear_setup_check_cache()
+
     return name
 
 
-def remove_primary_clan(tag: str) -> Union[str, None]:
+def remove_primary_clan(tag: str, cursor: Optional[pymysql.cursors.DictCursor]=None) -> Union[str, None]:
     """Remove the specified clan from the primary clans table.
 
     Args:
         tag: Tag of clan to be removed.
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+                Caller is responsible for committing changes made by cursor if provided, then calling clear_setup_check_cache and
+                ROLE.invalidate_cache.
 
     Returns:
         Name of clan that was removed, or None if it was not a primary clan.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("SELECT id, name FROM clans WHERE tag = %s", (tag))
-    query_result = cursor.fetchone()
     name = None
+    cursor_provided = cursor is not None
 
-    if query_result is not None:
-        clan_id = query_result["id"]
-        name = query_result["name"]
-        cursor.execute("DELETE FROM primary_clans WHERE clan_id = %s", (clan_id))
-        database.commit()
+    with db_utils.db_session(cursor) as cursor:
+        cursor.execute("SELECT id, name FROM clans WHERE tag = %s", (tag,))
+        query_result = cursor.fetchone()
+
+        if query_result is not None:
+            clan_id = query_result["id"]
+            name = query_result["name"]
+            cursor.execute("DELETE FROM primary_clans WHERE clan_id = %s", (clan_id,))
+
+    if name is not None and not cursor_provided:
+        ROLE.invalidate_cache()
+        clear_setup_check_cache()
 
-    database.close()
     return name
 
 
-def get_unset_clan_roles() -> List[ClanRole]:
+@cache_setup_check
+def get_unset_clan_roles(cursor: Optional[pymysql.cursors.DictCursor]=None) -> List[ClanRole]:
     """Get a list of any clan roles that do not have an assigned Discord role.
 
+    Args:
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+
     Returns:
         List of any clan roles that still need to be set. Empty list indicates that everything is set.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("SELECT role FROM clan_role_discord_roles")
-    query_result = cursor.fetchall()
-    database.close()
-    set_roles = {ClanRole(role["role"]) for role in query_result}
-    unset_roles = [role for role in ClanRole if role not in set_roles]
+    with db_utils.db_session(cursor, read_only=True) as cursor:
+        cursor.execute("SELECT role FROM clan_role_discord_roles")
+        query_result = cursor.fetchall()
+
+    set_roles = {role["role"] for role in query_result}
+    unset_roles = [role for role in ClanRole if role.value not in set_roles]
     return unset_roles
 
 
-def get_unset_special_roles() -> List[SpecialRole]:
+@cache_setup_check
+def get_unset_special_roles(cursor: Optional[pymysql.cursors.DictCursor]=None) -> List[SpecialRole]:
     """Get a list of any special roles that do not have an assigned Discord role.
 
+    Args:
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+
     Returns:
         List of any special roles that still need to be set. Empty list indicates that everything is set.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("SELECT role FROM special_discord_roles")
-    query_result = cursor.fetchall()
-    database.close()
-    set_roles = {SpecialRole(role["role"]) for role in query_result}
-    unset_roles = [role for role in SpecialRole if role not in set_roles]
+    with db_utils.db_session(cursor, read_only=True) as cursor:
+        cursor.execute("SELECT role FROM special_discord_roles")
+        query_result = cursor.fetchall()
+
+    set_roles = {role["role"] for role in query_result}
+    unset_roles = [role for role in SpecialRole if role.value not in set_roles]
     return unset_roles
 
 
-def get_unset_special_channels() -> List[SpecialChannel]:
+@cache_setup_check
+def get_unset_special_channels(cursor: Optional[pymysql.cursors.DictCursor]=None) -> List[SpecialChannel]:
     """Get a list of any unset special channels.
 
+    Args:
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+
     Returns:
         List of any special channels that still need to be set. Empty list indicates that everything is set.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("SELECT channel FROM special_discord_channels")
-    query_result = cursor.fetchall()
-    database.close()
-    set_channels = {SpecialChannel(channel["channel"]) for channel in query_result}
-    unset_channels = [channel for channel in SpecialChannel if channel not in set_channels]
+    with db_utils.db_session(cursor, read_only=True) as cursor:
+        cursor.execute("SELECT channel FROM special_discord_channels")
+        query_result = cursor.fetchall()
+
+    set_channels = {channel["channel"] for channel in query_result}
+    unset_channels = [channel for channel in SpecialChannel if channel.value not in set_channels]
     return unset_channels
 
 
-def is_primary_clan_set() -> bool:
+@cache_setup_check
+def is_primary_clan_set(cursor: Optional[pymysql.cursors.DictCursor]=None) -> bool:
     """Check that at least one primary clan is set.
 
+    Args:
+        cursor: Cursor used to interact with database. If not provided, will create a new one. Otherwise, use the one provided.
+
     Returns:
         Whether at least one primary clan is set.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("SELECT clan_id FROM primary_clans")
-    query_result = cursor.fetchone()
-    database.close()
+    with db_utils.db_session(cursor, read_only=True) as cursor:
+        cursor.execute("SELECT clan_id FROM primary_clans")
+        query_result = cursor.fetchone()
+
     return query_result is not None
 
 
 def finish_setup(season: int):
-    """Create season entry and create River Race data for all primary clans.
+    """Create season entry and create River Race data for all primary clans. The season counter is set first since ALTER TABLE
+       commits implicitly, then all other changes are made in a single transaction.
 
     Args:
         season: Current Clash Royale season.
@@ -199,15 +288,22 @@ def finish_setup(season: int):
     Raises:
         GeneralAPIError: Something went wrong with the request.
     """
-    database, cursor = db_utils.get_database_connection()
-    cursor.execute("ALTER TABLE seasons AUTO_INCREMENT = %s", (season))
-    cursor.execute("INSERT INTO seasons VALUES (DEFAULT, DEFAULT)")
-    database.commit()
-
-    for clan in db_utils.get_primary_clans():
-        db_utils.prepare_for_river_race(clan["tag"])
-        db_utils.update_river_race_clans(clan["tag"])
-
-    cursor.execute("UPDATE variables SET initialized = TRUE")
-    database.commit()
-    database.close()
+    tags = [clan["tag"] for clan in db_utils.get_primary_clans()]
+
+    with ThreadPoolExecutor() as executor:
+        races = list(executor.map(lambda tag: clash_utils.get_clans_in_race(tag, False), tags))
+
+    with db_utils.db_session() as cursor:
+        cursor.execute("ALTER TABLE seasons AUTO_INCREMENT = %s", (season,))
+
+    with db_utils.db_session() as cursor:
+        cursor.execute("INSERT INTO seasons VALUES (DEFAULT, DEFAULT)")
+        season_id = cursor.lastrowid
+        db_utils.prepare_for_river_races(tags, cursor, season_id)
+
+        for tag, clans_in_race in zip(tags, races):
+            db_utils.update_river_race_clans(tag, cursor, clans_in_race)
+
+        cursor.execute("UPDATE variables SET initialized = TRUE")
+
+    db_utils.clear_river_race_cache(tags)
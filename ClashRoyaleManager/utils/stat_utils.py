@@ -1,8 +1,12 @@
 """Various utilities for tracking and analyzing Battle Day statistics."""
 
+import bisect
 import datetime
-import numpy
-from typing import Dict, List, Tuple, Union
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from typing import Dict, List, Optional, Tuple, Union
 
 import utils.clash_utils as clash_utils
 import utils.db_utils as db_utils
@@ -12,19 +16,37 @@ from utils.custom_types import (
     BattleStats,
     ClanStrikeInfo,
     DatabaseRiverRaceClan,
+    Participant,
     PredictedOutcome,
     RiverRaceClan,
+    RiverRaceUserData,
     UserStrikeData
 )
 from utils.exceptions import GeneralAPIError
 
-def update_clan_battle_day_stats(tag: str, post_race: bool, api_is_broken: bool):
+STRIKE_DAY_KEYS: Tuple[Tuple[str, str, str, str, str], ...] = tuple(
+    (f"day_{day}", f"day_{day}_locked", f"day_{day}_outside_battles", f"day_{day}_active", f"day_{day}_in_clan")
+    for day in range(3, 8)
+)
+"""Deck usage, locked out, outside battles, active and in clan keys of each day that strikes are evaluated on, starting on day 3."""
+DEFAULT_WIN_RATE = 0.5
+"""Win rate assumed for clans without historical data."""
+DEFAULT_MEDALS_PER_DECK = 165.625
+"""Average medals per deck at DEFAULT_WIN_RATE, equal to average_medals_per_deck(DEFAULT_WIN_RATE)."""
+
+def update_clan_battle_day_stats(tag: str,
+                                 post_race: bool,
+                                 api_is_broken: bool,
+                                 prior_medal_counts: Optional[Dict[str, Tuple[int, datetime.datetime]]]=None,
+                                 last_clan_check: Optional[datetime.datetime]=None):
     """Check the battle logs of any users in a clan that have gained medals since the last check.
 
     Args:
         tag: Tag of clan to check users in.
         post_race: Whether this is occurring during or after a River Race.
         api_is_broken: Whether the API is currently reporting incorrect max card levels.
+        prior_medal_counts: Medal counts and last check times of users in the clan. If not provided, get them from the database.
+        last_clan_check: Last time the clan's stats were checked. If not provided, get it from the database.
     """
     db_utils.add_unregistered_users(tag)
 
@@ -33,50 +55,51 @@ def update_clan_battle_day_stats(tag: str, post_race: bool, api_is_broken: bool)
     else:
         participants = clash_utils.get_river_race_participants(tag)
 
-    prior_medal_counts = db_utils.get_medal_counts(tag)
-    last_clan_check = db_utils.get_last_check(tag)
-    current_time = db_utils.set_last_check(tag)
+    if prior_medal_counts is None or last_clan_check is None:
+        prior_medal_counts, last_clan_check, current_time = db_utils.start_battle_day_check(tag)
+    else:
+        current_time = db_utils.set_last_check(tag)
 
     if post_race:
         current_time = db_utils.get_most_recent_reset_time(tag)
 
-    stats_to_record: List[Tuple[BattleStats, Battles, int]] = []
-
-    for participant in participants:
-        player_tag = participant["tag"]
+    check_times = [battle_log_check_time(participant, prior_medal_counts, last_clan_check) for participant in participants]
+    battle_logs_to_check = [(participant, last_check) for participant, last_check in zip(participants, check_times)
+                            if last_check is not None]
+    results = clash_utils.get_battle_day_stats_many([(participant["tag"], last_check)
+                                                     for participant, last_check in battle_logs_to_check],
+                                                    tag,
+                                                    current_time)
+    stats_to_record: List[Tuple[BattleStats, Battles, int]] = [
+        (*result, participant["medals"]) for result, (participant, _) in zip(results, battle_logs_to_check) if result is not None
+    ]
 
-        if player_tag in prior_medal_counts:
-            prior_medals, last_check = prior_medal_counts[player_tag]
-
-            if participant["medals"] > prior_medals:
-                LOG.info(log_message("Participant has gained medals since last check",
-                                     name=participant["name"],
-                                     current_medals=participant["medals"],
-                                     prior_medals=prior_medals))
+    db_utils.record_battle_day_stats(stats_to_record, current_time, api_is_broken)
 
-                try:
-                    stats, battles = clash_utils.get_battle_day_stats(player_tag, tag, last_check, current_time)
-                except GeneralAPIError:
-                    LOG.warning(log_message("Failed to get stats", player_tag=player_tag, clan_tag=tag, last_check=last_check))
-                    continue
 
-                stats_to_record.append((stats, battles, participant["medals"]))
+def battle_log_check_time(participant: Participant,
+                          prior_medal_counts: Dict[str, Tuple[int, datetime.datetime]],
+                          last_clan_check: datetime.datetime) -> Union[datetime.datetime, None]:
+    """Determine whether a participant has gained medals since they were last checked.
 
-        elif participant["medals"] > 0:
-            LOG.info(log_message("New participant has gained medals since last check",
-                                 name=participant["name"],
-                                 current_medals=participant["medals"],
-                                 prior_medals=0))
+    Args:
+        participant: Participant to check.
+        prior_medal_counts: Medal counts and last check times of users in the participant's clan.
+        last_clan_check: Last time the clan's stats were checked.
 
-            try:
-                stats, battles = clash_utils.get_battle_day_stats(player_tag, tag, last_clan_check, current_time)
-            except GeneralAPIError:
-                LOG.warning(log_message("Failed to get stats", player_tag=player_tag, clan_tag=tag, last_check=last_clan_check))
-                continue
+    Returns:
+        Time to start checking the participant's battle log from, or None if they have not gained any medals.
+    """
+    prior_medals, last_check = prior_medal_counts.get(participant["tag"], (0, last_clan_check))
 
-            stats_to_record.append((stats, battles, participant["medals"]))
+    if participant["medals"] <= prior_medals:
+        return None
 
-    db_utils.record_battle_day_stats(stats_to_record, current_time, api_is_broken)
+    LOG.info(log_message("Participant has gained medals since last check",
+                         name=participant["name"],
+                         current_medals=participant["medals"],
+                         prior_medals=prior_medals))
+    return last_check
 
 
 def save_river_race_clans_info(tag: str, post_race: bool):
@@ -92,28 +115,17 @@ def save_river_race_clans_info(tag: str, post_race: bool):
         LOG.warning(log_message("Unable to get clans in race", tag=tag, post_race=post_race))
         return
 
-    saved_clan_data = db_utils.get_current_season_river_race_clans(tag)
-    is_colosseum_week = db_utils.is_colosseum_week(tag)
-    data_to_save: List[DatabaseRiverRaceClan] = []
+    # Clans that finished the race early stop accumulating stats, except during Colosseum week where there is no finish line
+    skip_completed_clans = post_race and not db_utils.is_colosseum_week(tag)
+    latest_clan_data: Dict[str, Tuple[int, int]] = {}
 
-    for tag, current_data in current_clan_data.items():
-        if post_race and current_data["completed"] and not is_colosseum_week:
+    for clan_tag, current_data in current_clan_data.items():
+        if skip_completed_clans and current_data["completed"]:
             continue
 
-        saved_data = saved_clan_data[tag]
-        updated_data = saved_data.copy()
-        medals_earned_today = current_data["medals"] - saved_data["current_race_medals"]
-        current_race_total_decks = current_data["total_decks_used"]
-        battle_decks_used_today = current_race_total_decks - saved_data["current_race_total_decks"]
+        latest_clan_data[clan_tag] = (current_data["medals"], current_data["total_decks_used"])
 
-        updated_data["current_race_medals"] = current_data["medals"]
-        updated_data["total_season_medals"] += medals_earned_today
-        updated_data["current_race_total_decks"] = current_race_total_decks
-        updated_data["total_season_battle_decks"] += battle_decks_used_today
-        updated_data["battle_days"] += 1
-        data_to_save.append(updated_data)
-
-    db_utils.update_current_season_river_race_clans(data_to_save)
+    db_utils.update_current_season_river_race_clans(tag, latest_clan_data)
 
 
 def determine_strikes(clan_strike_data: ClanStrikeInfo) -> List[UserStrikeData]:
@@ -125,30 +137,39 @@ def determine_strikes(clan_strike_data: ClanStrikeInfo) -> List[UserStrikeData]:
     Returns:
         List of user data for users that should receive a strike.
     """
-    river_race_user_data = db_utils.get_river_race_user_data(clan_strike_data["river_race_id"])
     reset_times = clan_strike_data["reset_times"]
-    day_keys = ["day_3", "day_4", "day_5", "day_6", "day_7"]
+    river_race_user_data = db_utils.get_river_race_user_data(clan_strike_data["river_race_id"], reset_times)
     max_day_index = 3 if clan_strike_data["completed_saturday"] else 4
-    strikes: List[UserStrikeData] = []
+    strike_threshold = clan_strike_data["strike_threshold"]
+    users_to_check: List[Tuple[RiverRaceUserData, int]] = []
 
     for user_data in river_race_user_data:
-        should_receive_strike = False
-
         # Skip any users that were never a part of the clan in this River Race
         if user_data["tracked_since"] is None:
             continue
 
         # Determine which day to start evaluating from based on when the bot started tracking them
-        first_participation_day = 1
+        first_participation_day = bisect.bisect_right(reset_times, user_data["tracked_since"], 1)
+
+        if first_participation_day == len(reset_times):
+            first_participation_day = 1
+
+        # Most users meet the requirement every day, so skip the per-day checks for them
+        tracked_deck_usage = [user_data[day_keys[0]] for day_keys in STRIKE_DAY_KEYS[first_participation_day:max_day_index + 1]]
 
-        for day_index, reset_time in enumerate(reset_times[1:], 1):
-            if user_data["tracked_since"] < reset_time:
-                first_participation_day = day_index
-                break
+        if None not in tracked_deck_usage and min(tracked_deck_usage, default=strike_threshold) >= strike_threshold:
+            continue
+
+        users_to_check.append((user_data, first_participation_day))
+
+    strikes: List[UserStrikeData] = []
+
+    for user_data, first_participation_day in users_to_check:
+        should_receive_strike = False
 
         # Iterate through days that user was in the clan and determine if they met their minimum requirement
         for day_index in range(first_participation_day, max_day_index + 1):
-            day_key = day_keys[day_index]
+            day_key, locked_key, outside_battles_key, active_key, in_clan_key = STRIKE_DAY_KEYS[day_index]
             decks_used = user_data[day_key]
 
             if decks_used is None:
@@ -157,7 +178,7 @@ def determine_strikes(clan_strike_data: ClanStrikeInfo) -> List[UserStrikeData]:
                                         clan_affiliation_id=user_data["clan_affiliation_id"]))
                 continue
 
-            if decks_used >= clan_strike_data["strike_threshold"]:
+            if decks_used >= strike_threshold:
                 continue
 
             LOG.info(log_message("Checking for deck usage exemption",
@@ -167,12 +188,12 @@ def determine_strikes(clan_strike_data: ClanStrikeInfo) -> List[UserStrikeData]:
 
             # Did not meet minimum minimum deck usage
             # First check if they were locked out due to clan reaching participation cap
-            if user_data[day_key + "_locked"]:
+            if user_data[locked_key]:
                 LOG.info("User was locked out")
                 continue
 
             # Not locked out, so check if they used outside battles but still had decks left to use in primary clan
-            outside_battles = user_data[day_key + "_outside_battles"]
+            outside_battles = user_data[outside_battles_key]
 
             if outside_battles is not None:
                 unused_decks = 4 - (outside_battles + decks_used)
@@ -182,48 +203,27 @@ def determine_strikes(clan_strike_data: ClanStrikeInfo) -> List[UserStrikeData]:
                     continue
 
             # Don't give strike if they were not in the clan this day
-            was_in_clan = False
-
-            if not user_data[day_key + "_active"] and decks_used == 0:
-                clan_times = db_utils.get_clan_times(user_data["clan_affiliation_id"])
-
-                if not clan_times:
-                    LOG.warning("Expected clan times but received empty list")
+            if not user_data[active_key] and decks_used == 0:
+                if not user_data[in_clan_key]:
                     continue
 
-                day_start = reset_times[day_index - 1]
-                day_end = reset_times[day_index]
-
-                for clan_time_start, clan_time_end in clan_times:
-                    if ((clan_time_start < day_start and clan_time_end is None) or
-                        (clan_time_start < day_start < clan_time_end) or
-                        (day_start < clan_time_start < day_end)):
-                        LOG.info(log_message("User was active in clan on this day",
-                                             day_start=day_start,
-                                             day_end=day_end,
-                                             clan_time_start=clan_time_start,
-                                             clan_time_end=clan_time_end))
-                        was_in_clan = True
-                        break
-
-                if not was_in_clan:
-                    continue
+                LOG.info(log_message("User was active in clan on this day",
+                                     day_start=reset_times[day_index - 1],
+                                     day_end=reset_times[day_index]))
 
             # No valid excuses found, so assign strike
             should_receive_strike = True
             break
 
         if should_receive_strike:
-            name, tag = db_utils.get_name_and_tag_from_affiliation(user_data["clan_affiliation_id"])
-
-            if name is None:
+            if user_data["name"] is None:
                 LOG.warning("Unable to get name and tag from affiliation id")
                 continue
 
             strikes.append(
                 {
-                    "name": name,
-                    "tag": tag,
+                    "name": user_data["name"],
+                    "tag": user_data["tag"],
                     "tracked_since": user_data["tracked_since"],
                     "deck_usage": [user_data[key] for key in ["day_4", "day_5", "day_6", "day_7"]]
                 }
@@ -257,7 +257,8 @@ def calculate_win_rate_from_average_medals(avg_medals_per_deck: float) -> float:
     """Solve the polynomial described in average_medals_per_deck.
 
     Determine what win rate is needed to achieve the specified medals per deck. All assumptions described above hold true here as
-    well. If no roots can be determined, then None is returned.
+    well. If no roots can be determined, then None is returned. Medals per deck are rounded to the nearest hundredth so that
+    results can be cached.
 
     Args:
         avg_medals_per_deck: Average medals per deck to calculate win rate of.
@@ -265,14 +266,32 @@ def calculate_win_rate_from_average_medals(avg_medals_per_deck: float) -> float:
     Returns:
         Win rate needed to achieve the specified average medals per deck, or None if no solution exists.
     """
-    roots = numpy.roots([-25, 25, 125, (100 - avg_medals_per_deck)])
-    win_rate = None
+    return win_rate_from_hundredths_of_medals(round(avg_medals_per_deck * 100))
+
+
+@functools.lru_cache(maxsize=2048)
+def win_rate_from_hundredths_of_medals(hundredths_of_medals: int) -> float:
+    """Solve the polynomial described in average_medals_per_deck for medals per deck given in hundredths of a medal.
+
+    Args:
+        hundredths_of_medals: Average medals per deck multiplied by 100.
+
+    Returns:
+        Win rate needed to achieve the specified average medals per deck, or None if no solution exists.
+    """
+    avg_medals_per_deck = hundredths_of_medals / 100
 
-    for root in roots:
-        if 0 <= root <= 1:
-            win_rate = root
+    # F(p) is strictly increasing on [0, 1] from F(0) = 100 to F(1) = 225, so a solution only exists within that range
+    if not 100 <= avg_medals_per_deck <= 225:
+        return None
 
-    return win_rate
+    # Dividing by -25 gives p^3 - p^2 - 5p + (m - 100)/25 = 0. Substituting p = t + 1/3 gives the depressed cubic t^3 + at + b = 0.
+    # It always has three real roots in this range, and the trigonometric solution for k=1 is the middle root, which lies in [0, 1].
+    a = -16 / 3
+    b = (avg_medals_per_deck - 100) / 25 - 47 / 27
+    theta = math.acos((3 * b) / (2 * a) * math.sqrt(-3 / a)) / 3
+    win_rate = 2 * math.sqrt(-a / 3) * math.cos(theta - (2 * math.pi / 3)) + 1 / 3
+    return min(max(win_rate, 0.0), 1.0)
 
 
 def predict_race_outcome(tag: str, historical_win_rates: bool, historical_deck_usage: bool) -> List[PredictedOutcome]:
@@ -284,73 +303,90 @@ def predict_race_outcome(tag: str, historical_win_rates: bool, historical_deck_u
     Raises:
         GeneralAPIError: Something went wrong with the request.
     """
-    database_clan_data = db_utils.get_current_season_river_race_clans(tag)
-    current_clan_data = clash_utils.get_clans_in_race(tag, False)
-    medals_per_deck: Dict[str, float] = {}
+    # Saved data comes from the database and current data comes from the API, so fetch both at the same time
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        database_clan_data_future = executor.submit(db_utils.get_current_season_river_race_clans, tag)
+        current_clan_data_future = executor.submit(clash_utils.get_clans_in_race, tag, False)
+        database_clan_data = database_clan_data_future.result()
+        current_clan_data = current_clan_data_future.result()
+
     expected_deck_usage: Dict[str, int] = {}
     predicted_outcomes: List[PredictedOutcome] = []
     is_colosseum_week = db_utils.is_colosseum_week(tag)
+    # Scores accumulate across every Battle Day of Colosseum week, otherwise only medals earned today count towards the score
+    prior_race_medals_weight = 0 if is_colosseum_week else 1
 
     if not database_clan_data:
         LOG.error(f"No saved River Race clans for {tag} to make prediction")
         db_utils.update_river_race_clans(tag)
         return predicted_outcomes
-    elif database_clan_data.keys() != current_clan_data.keys():
+
+    mismatched_clans = database_clan_data.keys() ^ current_clan_data.keys()
+
+    if mismatched_clans:
         LOG.error(log_message("Mismatch between saved and current River Race clans",
                               tag=tag,
-                              database_clan_data=database_clan_data,
-                              current_clan_data=current_clan_data))
+                              missing_from_database=sorted(mismatched_clans - database_clan_data.keys()),
+                              missing_from_api=sorted(mismatched_clans - current_clan_data.keys())))
         return predicted_outcomes
 
     combined_data: Dict[str, Tuple[DatabaseRiverRaceClan, RiverRaceClan]] =\
         {clan_tag: (database_clan_data[clan_tag], current_clan_data[clan_tag]) for clan_tag in current_clan_data}
 
+    # Calculate each clan's expected performance and predicted score in a single pass
     for clan_tag, (saved_clan_data, current_clan_data) in combined_data.items():
+        current_medals = current_clan_data["medals"]
+        current_decks_used_today = current_clan_data["decks_used_today"]
+        saved_race_medals = saved_clan_data["current_race_medals"]
+        saved_season_decks = saved_clan_data["total_season_battle_decks"]
+        battle_days = saved_clan_data["battle_days"]
+
         # Calculate each clan's average medals per deck
         if historical_win_rates:
-            total_decks = current_clan_data["decks_used_today"] + saved_clan_data["total_season_battle_decks"]
-            total_medals = ((current_clan_data["medals"] - saved_clan_data["current_race_medals"]) +
-                            saved_clan_data["total_season_medals"])
+            total_decks = current_decks_used_today + saved_season_decks
+            total_medals = (current_medals - saved_race_medals) + saved_clan_data["total_season_medals"]
 
             if total_decks == 0:
-                medals_per_deck[clan_tag] = 165.625
+                medals_per_deck = DEFAULT_MEDALS_PER_DECK
             else:
-                medals_per_deck[clan_tag] = total_medals / total_decks
+                medals_per_deck = total_medals / total_decks
         else:
-            medals_per_deck[clan_tag] = 165.625
-
-        current_decks_used_today = current_clan_data["decks_used_today"]
+            medals_per_deck = DEFAULT_MEDALS_PER_DECK
 
         # Calculate expected number of decks for each to clan to use
         if historical_deck_usage:
-            if saved_clan_data["battle_days"] == 0:
+            if battle_days == 0:
                 expected_decks_left = 200 - current_decks_used_today
             else:
-                avg_deck_usage = round(saved_clan_data["total_season_battle_decks"] / saved_clan_data["battle_days"])
+                avg_deck_usage = round(saved_season_decks / battle_days)
 
                 if current_decks_used_today > avg_deck_usage:
                     expected_decks_left = round((200 - current_decks_used_today) * 0.25)
                 else:
                     expected_decks_left = avg_deck_usage - current_decks_used_today
+        else:
+            expected_decks_left = 200 - current_decks_used_today
+
+        expected_deck_usage[clan_tag] = expected_decks_left
 
-            expected_deck_usage[clan_tag] = expected_decks_left
+        # Calculate predicted score
+        base_medals = current_medals - prior_race_medals_weight * saved_race_medals
+        predicted_score = 50 * round((base_medals + (expected_decks_left * medals_per_deck)) / 50)
+
+        if medals_per_deck == DEFAULT_MEDALS_PER_DECK:
+            win_rate = DEFAULT_WIN_RATE
         else:
-            expected_deck_usage[clan_tag] = 200 - current_decks_used_today
-    
-    # Calculate predicted scores
-    for clan_tag, (saved_clan_data, current_clan_data) in combined_data.items():
-        base_medals = current_clan_data["medals"] - (0 if is_colosseum_week else saved_clan_data["current_race_medals"])
-        predicted_score = 50 * round((base_medals + (expected_deck_usage[clan_tag] * medals_per_deck[clan_tag])) / 50)
+            win_rate = calculate_win_rate_from_average_medals(medals_per_deck)
 
         predicted_outcome: PredictedOutcome = {
             "tag": clan_tag,
             "name": current_clan_data["name"],
             "current_score": base_medals,
             "predicted_score": predicted_score,
-            "win_rate": calculate_win_rate_from_average_medals(medals_per_deck[clan_tag]),
-            "expected_decks_to_use": expected_deck_usage[clan_tag],
+            "win_rate": win_rate,
+            "expected_decks_to_use": expected_decks_left,
             "expected_decks_catchup_win_rate": None,
-            "remaining_decks": 200 - current_clan_data["decks_used_today"],
+            "remaining_decks": 200 - current_decks_used_today,
             "remaining_decks_catchup_win_rate": None,
             "completed": current_clan_data["completed"] and not is_colosseum_week
         }
@@ -360,7 +396,7 @@ def predict_race_outcome(tag: str, historical_win_rates: bool, historical_deck_u
 
         predicted_outcomes.append(predicted_outcome)
 
-    predicted_outcomes.sort(key=lambda x: x["predicted_score"], reverse=True)
+    predicted_outcomes.sort(key=itemgetter("predicted_score"), reverse=True)
     winning_score = predicted_outcomes[0]["predicted_score"]
 
     # Calculate win rates needed for clans not in first place to catch up